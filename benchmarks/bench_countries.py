@@ -0,0 +1,55 @@
+"""Compares resolving country names with the precomputed index and the fuzzy search.
+
+Usage:
+    python benchmarks/bench_countries.py
+"""
+
+import pycountry
+
+import harness
+import countries
+
+
+# spellings the geocoding api returns countries with
+COUNTRY_NAMES = (
+        "United States",
+        "Russia",
+        "United Kingdom",
+        "Germany",
+        "France",
+        "Italy",
+        "Spain",
+        "Türkiye",
+        "South Korea",
+        "Vietnam",
+        )
+
+
+@harness.benchmark("build country index")
+def build_country_index(_):
+    def build():
+        countries.get_country_index.cache_clear()
+        return countries.get_country_index()
+    return build
+
+
+@harness.benchmark("resolve with fuzzy search")
+def resolve_with_fuzzy_search(_):
+    def resolve():
+        for name in COUNTRY_NAMES:
+            pycountry.countries.search_fuzzy(name)[0].alpha_2
+    return resolve
+
+
+@harness.benchmark("resolve with index")
+def resolve_with_index(_):
+    countries.get_country_index()
+
+    def resolve():
+        for name in COUNTRY_NAMES:
+            countries.find_country_code(name)
+    return resolve
+
+
+if __name__ == "__main__":
+    harness.main()
@@ -0,0 +1,88 @@
+"""Benchmarks of the memory the models take while they are cached.
+
+The found properties and locations are kept alive in the caches and in the
+user data of each conversation, so the bytes per model matter. The retained
+memory of each benchmark is the memory the returned models take, and the
+bytes per model are printed separately along with the pickled size, which
+is what the sqlite cache stores.
+
+Usage:
+    python benchmarks/bench_models.py
+    python benchmarks/bench_models.py --save before.json
+"""
+
+import json
+import pickle
+import tracemalloc
+
+import harness
+import fake_rapidapi
+
+from lib import hotels, geocoding
+
+
+COUNT = 1000
+
+SYNTHETIC = fake_rapidapi.SyntheticFixtures()
+
+
+def build_properties_response(count: int) -> dict:
+    return json.loads(json.dumps(SYNTHETIC.properties("2621", count)))
+
+
+def build_geocoding_response(count: int) -> list:
+    return [SYNTHETIC.forward("city {0}".format(i))[0] for i in range(count)]
+
+
+@harness.benchmark("cached properties", params=(COUNT,))
+def cached_properties(count):
+    response = build_properties_response(count)
+    return lambda: hotels._parse_properties_response_into_dataclasses(response)
+
+
+@harness.benchmark("cached properties with details", params=(COUNT,))
+def cached_properties_with_details(count):
+    response = build_properties_response(count)
+    details = hotels._parse_property_details(SYNTHETIC.property_details("2621"), 4)
+
+    def parse():
+        properties = hotels._parse_properties_response_into_dataclasses(response)
+        for prop in properties:
+            hotels._update_property_with_details(details, prop)
+        return properties
+    return parse
+
+
+@harness.benchmark("cached cities", params=(COUNT,))
+def cached_cities(count):
+    response = build_geocoding_response(count)
+    return lambda: geocoding._parse_locations_from_geocoding(response)
+
+
+def measure_bytes_per_model(func) -> float:
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        models = func()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (after - before) / len(models)
+
+
+def print_bytes_per_model():
+    print("\nbytes per model:")
+    for bench in harness.BENCHMARKS:
+        for param in bench.params:
+            func = bench.setup(param)
+            models = func()
+            print("{0:<48} {1:>8.0f}B in memory {2:>8.0f}B pickled".format(
+                bench.name,
+                measure_bytes_per_model(func),
+                len(pickle.dumps(models)) / len(models),
+                ))
+
+
+if __name__ == "__main__":
+    harness.main()
+    print_bytes_per_model()
@@ -0,0 +1,123 @@
+"""Benchmarks of the api response parsers and the search payload builder.
+
+They run on every request, so they are measured on the payloads of a few
+sizes. The decoding of the search responses is measured along with the
+parsing, with the json module and with the decoder the api uses, which is
+orjson if it's installed, their parity is tested in tests/test_decoding.py.
+The payloads are the synthetic ones of the fake api, which mimic the
+recorded responses, and the recorded fixtures from tools/fixtures if any.
+
+Usage:
+    python benchmarks/bench_parsers.py
+    python benchmarks/bench_parsers.py -k properties --save before.json
+    python benchmarks/bench_parsers.py --compare before.json
+"""
+
+import os
+import glob
+import json
+
+import harness
+import fake_rapidapi
+
+from lib import hotels, geocoding, models
+from base import api
+
+
+SIZES = (50, 200, 1000)
+LOCATIONS_SIZES = (10, 50)
+
+FIXTURES_PATH = os.path.join(harness.TOOLS_PATH, "fixtures")
+
+SYNTHETIC = fake_rapidapi.SyntheticFixtures()
+
+
+def build_properties_response(size: int) -> dict:
+    # the payload is round-tripped through JSON to be shaped as a decoded response
+    return json.loads(json.dumps(SYNTHETIC.properties("2621", size)))
+
+
+def build_locations_response(size: int) -> dict:
+    locations = [SYNTHETIC.locations("city {0}".format(i))["sr"][0] for i in range(size)]
+    return {"sr": locations}
+
+
+def build_geocoding_response(size: int) -> list:
+    return [SYNTHETIC.forward("city {0}".format(i))[0] for i in range(size)]
+
+
+@harness.benchmark("parse properties response", params=SIZES)
+def parse_properties_response(size):
+    response = build_properties_response(size)
+    return lambda: hotels._parse_properties_response_into_dataclasses(response)
+
+
+@harness.benchmark("parse property")
+def parse_property(_):
+    prop = build_properties_response(1)["data"]["propertySearch"]["properties"][0]
+    return lambda: hotels._parse_property_into_dataclass(prop)
+
+
+@harness.benchmark("parse locations response", params=LOCATIONS_SIZES)
+def parse_locations_response(size):
+    response = build_locations_response(size)
+    return lambda: hotels._parse_locations_response_into_dataclasses(response)
+
+
+@harness.benchmark("parse geocoding response", params=LOCATIONS_SIZES)
+def parse_geocoding_response(size):
+    response = build_geocoding_response(size)
+    return lambda: geocoding._parse_locations_from_geocoding(response)
+
+
+@harness.benchmark("build search payload")
+def build_search_payload(_):
+    kwargs = dict(
+            currency=models.EnumCurrency.USD,
+            locale=models.EnumLocale.en_GB,
+            destination=hotels.HotelsDestinationRegionID(2621),
+            check_in=hotels.HotelsCheckpoint(day=1, month=1, year=2030),
+            check_out=hotels.HotelsCheckpoint(day=5, month=1, year=2030),
+            rooms=hotels.HotelsRooms(adults=1),
+            result_offset=0,
+            result_limit=50,
+            sort=hotels.EnumHotelsSort.price_asc,
+            filters=[hotels.HotelsPriceFilter(max_price=500, min_price=50)],
+            )
+    return lambda: hotels._build_payload_for_hotels_search(**kwargs)
+
+
+@harness.benchmark("parse property details", params=(None, 4))
+def parse_property_details(images_count):
+    # galleries of the large hotels are hundreds of images long
+    response = fake_rapidapi.SyntheticFixtures(images_count=300).property_details("2621")
+    return lambda: hotels._parse_property_details(response, images_count)
+
+
+@harness.benchmark("decode and parse properties with json", params=SIZES)
+def decode_and_parse_properties_with_json(size):
+    content = json.dumps(SYNTHETIC.properties("2621", size)).encode()
+    return lambda: hotels._parse_properties_response_into_dataclasses(json.loads(content))
+
+
+@harness.benchmark("decode and parse properties", params=SIZES)
+def decode_and_parse_properties(size):
+    content = json.dumps(SYNTHETIC.properties("2621", size)).encode()
+    return lambda: hotels._parse_properties_response_into_dataclasses(api.decode_json(content))
+
+
+# recorded responses are benchmarked as they are, by the name of the fixture
+_recorded_paths = sorted(glob.glob(os.path.join(FIXTURES_PATH, "properties_list", "*.json")))
+
+
+@harness.benchmark("parse recorded properties response", params=[
+    os.path.basename(path) for path in _recorded_paths
+    ])
+def parse_recorded_properties_response(name):
+    with open(os.path.join(FIXTURES_PATH, "properties_list", name)) as f:
+        response = json.load(f)
+    return lambda: hotels._parse_properties_response_into_dataclasses(response)
+
+
+if __name__ == "__main__":
+    harness.main()
@@ -0,0 +1,132 @@
+"""Benchmarks of ranking the found properties.
+
+The ranking of the properties as dataclasses, sorted by the key functions
+and filtered one by one, is compared with the ranking of the columnar batch
+of them. The batch is built once per search and cached, so its' building is
+measured separately. The batch is vectorized with numpy if it's installed.
+
+The search selects only the first hotels the user asked for, so the ranking
+of the top of the batch is measured on the growing result sets, to see how
+it scales compared with the full sort.
+
+The best deals are ranked by the Pareto layers of the price and the distance,
+which are compared with the layers found by the pairwise comparisons, those
+are measured on the small sizes only, as they are quadratic. Their parity is
+tested in tests/test_batches.py.
+
+Usage:
+    python benchmarks/bench_ranking.py
+    python benchmarks/bench_ranking.py -k batch --save before.json
+"""
+
+import json
+import functools
+
+import harness
+import fake_rapidapi
+
+from lib import hotels, batches
+
+
+SIZES = (200, 1000, 10000, 50000)
+
+# as many hotels as the users usually ask for
+TOP_COUNT = 10
+
+NAIVE_SIZES = (200, 1000)
+
+# about a half of the synthetic properties are within the distance
+MAX_DISTANCE = 3
+
+SYNTHETIC = fake_rapidapi.SyntheticFixtures()
+
+
+@functools.lru_cache(maxsize=None)
+def build_properties(size: int) -> list:
+    response = json.loads(json.dumps(SYNTHETIC.properties("2621", size)))
+    return hotels._parse_properties_response_into_dataclasses(response)
+
+
+@harness.benchmark("rank property dataclasses", params=SIZES)
+def rank_property_dataclasses(size):
+    properties = build_properties(size)
+
+    def rank():
+        ranked = sorted(properties, key=lambda prop: prop.price.price)
+        return [
+                prop for prop in ranked
+                if float(prop.distance_from_downtown.get_kilometers()) <= MAX_DISTANCE
+                ]
+    return rank
+
+
+@harness.benchmark("build property batch", params=SIZES)
+def build_property_batch(size):
+    properties = build_properties(size)
+    return lambda: batches.PropertyBatch(properties)
+
+
+@harness.benchmark("rank property batch", params=SIZES)
+def rank_property_batch(size):
+    batch = batches.PropertyBatch(build_properties(size))
+
+    def rank():
+        ranked = batch.filter_range("distance", max_value=MAX_DISTANCE)
+        return ranked.sort_by(("price",))
+    return rank
+
+
+@harness.benchmark("rank top of property batch", params=SIZES)
+def rank_top_of_property_batch(size):
+    batch = batches.PropertyBatch(build_properties(size))
+
+    def rank():
+        ranked = batch.filter_range("distance", max_value=MAX_DISTANCE)
+        return ranked.sort_by(("price",), limit=TOP_COUNT)
+    return rank
+
+
+def find_layers_naively(batch: batches.PropertyBatch) -> list:
+    """Returns the Pareto layers of the rows comparing each pair of them."""
+    points = list(zip(batch.get_column("price"), batch.get_column("distance")))
+    left = set(range(len(points)))
+    layers = [None] * len(points)
+    layer = 0
+    while left:
+        front = [
+                row for row in left
+                if not any(
+                    points[other] != points[row]
+                    and points[other][0] <= points[row][0]
+                    and points[other][1] <= points[row][1]
+                    for other in left
+                    )
+                ]
+        for row in front:
+            layers[row] = layer
+        left.difference_update(front)
+        layer += 1
+    return layers
+
+
+@harness.benchmark("rank best deals naively", params=NAIVE_SIZES)
+def rank_best_deals_naively(size):
+    batch = batches.PropertyBatch(build_properties(size))
+    return lambda: find_layers_naively(batch)
+
+
+@harness.benchmark("rank best deals of property batch", params=SIZES)
+def rank_best_deals_of_property_batch(size):
+    batch = batches.PropertyBatch(build_properties(size))
+    return lambda: batch.rank_best_deals()
+
+
+@harness.benchmark("rank top best deals of property batch", params=SIZES)
+def rank_top_best_deals_of_property_batch(size):
+    batch = batches.PropertyBatch(build_properties(size))
+    return lambda: batch.rank_best_deals(limit=TOP_COUNT)
+
+
+if __name__ == "__main__":
+    print("numpy: {0}".format("yes" if batches.numpy is not None else "no"))
+    harness.main()
@@ -0,0 +1,227 @@
+"""A shared harness of the benchmarks measuring time and allocations.
+
+Benchmarks are registered with the benchmark decorator, which wraps a setup
+function: it's called once per parameter and returns a function to measure.
+Each measured function is timed with timeit, and its' memory allocations are
+traced with tracemalloc on a separate call, so that tracing doesn't skew the
+time.
+
+The results are stored as JSON, so that a run could be compared with another
+one, e.g: before and after a change to the parsers.
+
+Usage:
+    import harness
+
+    @harness.benchmark("parse properties", params=(50, 200, 1000))
+    def parse_properties(size):
+        response = build_response(size)
+        return lambda: parse(response)
+
+    if __name__ == "__main__":
+        harness.main()
+
+    # then
+    python benchmarks/bench_parsers.py --save before.json
+    python benchmarks/bench_parsers.py --compare before.json
+
+"""
+
+import os
+import sys
+import json
+import time
+import timeit
+import logging
+import argparse
+import platform
+import statistics
+import tracemalloc
+
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+TOOLS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools")
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# the benchmarks measure the bot code, which lives in the src, and reuse the
+# synthetic payloads of the fake api from the tools
+sys.path.insert(0, SRC_PATH)
+sys.path.insert(0, TOOLS_PATH)
+
+
+class Benchmark:
+    """A registered benchmark.
+
+    Attributes:
+        name: a name of the benchmark, unique within a run
+        setup: a function taking a parameter and returning a function to measure
+        params: parameters the benchmark is run with, e.g: payload sizes
+    """
+
+    def __init__(self, name: str, setup: Callable, params: Sequence):
+        self.name = name
+        self.setup = setup
+        self.params = params
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str, params: Sequence = (None,)):
+    """Registers a setup function as a benchmark, see the module docs."""
+    def decorator(setup):
+        BENCHMARKS.append(Benchmark(name, setup, params))
+        return setup
+    return decorator
+
+
+def get_result_key(result: dict) -> str:
+    if result["param"] is None:
+        return result["name"]
+    return "{0}[{1}]".format(result["name"], result["param"])
+
+
+def measure(func: Callable, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """Measures time and allocations of a function call.
+
+    Args:
+        func: a function to measure
+        repeat: how many times to repeat the timing, the best one is the
+            most stable to compare by
+        min_time: a minimum time in seconds each repeat should take, the
+            amount of calls per repeat is chosen to fit it
+
+    Returns:
+        times per call in seconds and allocations of a single call in bytes
+    """
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(number, int(number * min_time / elapsed) if elapsed else number)
+    times = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = func()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    return {
+            "number": number,
+            "time": {
+                "min": min(times),
+                "median": statistics.median(times),
+                "mean": statistics.fmean(times),
+                },
+            "memory": {
+                "peak": peak - before,
+                "retained": after - before,
+                },
+            }
+
+
+def run(
+        benchmarks: Sequence[Benchmark],
+        name_filter: str = None,
+        repeat: int = 5,
+        min_time: float = 0.2,
+        ) -> List[dict]:
+    """Runs the benchmarks and returns their results."""
+    results = []
+    for bench in benchmarks:
+        if name_filter and name_filter not in bench.name:
+            continue
+        for param in bench.params:
+            func = bench.setup(param)
+            result = {"name": bench.name, "param": param}
+            result.update(measure(func, repeat=repeat, min_time=min_time))
+            results.append(result)
+            print_result(result)
+    return results
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 10 ** 3), ("us", 10 ** 6)):
+        if seconds * scale >= 1:
+            return "{0:.2f}{1}".format(seconds * scale, unit)
+    return "{0:.2f}ns".format(seconds * 10 ** 9)
+
+
+def _format_bytes(size: float) -> str:
+    for unit, scale in (("MiB", 1024 ** 2), ("KiB", 1024)):
+        if abs(size) >= scale:
+            return "{0:.1f}{1}".format(size / scale, unit)
+    return "{0:.0f}B".format(size)
+
+
+def _format_change(new: float, old: Optional[float]) -> str:
+    if not old:
+        return ""
+    return " ({0:+.1f}%)".format((new - old) / old * 100)
+
+
+def print_result(result: dict, baseline: dict = None):
+    old_time = baseline["time"]["min"] if baseline else None
+    old_peak = baseline["memory"]["peak"] if baseline else None
+    print("{0:<48} {1:>12}{2:<10} peak {3:>10}{4}".format(
+        get_result_key(result),
+        _format_time(result["time"]["min"]),
+        _format_change(result["time"]["min"], old_time),
+        _format_bytes(result["memory"]["peak"]),
+        _format_change(result["memory"]["peak"], old_peak),
+        ))
+
+
+def load_results(path: str) -> Dict[str, dict]:
+    """Loads the stored results indexed by their keys."""
+    with open(path) as f:
+        stored = json.load(f)
+    return {get_result_key(result): result for result in stored["results"]}
+
+
+def save_results(path: str, results: List[dict]):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    stored = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+            }
+    with open(path, "w") as f:
+        json.dump(stored, f, indent=2)
+
+
+def main(argv=None):
+    """Runs the registered benchmarks as a command line script."""
+    script = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    parser = argparse.ArgumentParser(description="Runs the {0} benchmarks".format(script))
+    parser.add_argument("-k", "--filter", help="run only the benchmarks with the substring in the name")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2,
+            help="a minimum time of each repeat in seconds")
+    parser.add_argument("--save", nargs="?", const="",
+            help="a file to store the results in, by default in the benchmarks/results")
+    parser.add_argument("--compare", help="stored results to compare the run with")
+    args = parser.parse_args(argv)
+
+    # the bot logs debug messages in the parsers, measuring them is not the point
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = run(BENCHMARKS, args.filter, repeat=args.repeat, min_time=args.min_time)
+
+    if args.compare:
+        baseline = load_results(args.compare)
+        print("\ncompared with {0}:".format(args.compare))
+        for result in results:
+            print_result(result, baseline.get(get_result_key(result)))
+
+    if args.save is not None:
+        path = args.save or os.path.join(
+                RESULTS_PATH,
+                "{0}-{1}.json".format(script, time.strftime("%Y%m%d-%H%M%S"))
+                )
+        save_results(path, results)
+        print("\nresults are stored in {0}".format(path))
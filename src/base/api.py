@@ -3,15 +3,132 @@ This module contains of either ABC classes for the library or Base classes.
 
 By the moment of writin this comment it has next base classes:
     RapidAPIBase
+    AsyncRapidAPIBase
+
+And a Deadline to bound the time of the requests made by AsyncRapidAPIBase.
 
 
 Usage:
     Well, basically derive from the objects listed here like this:
     class MyGreatAPI(RapidAPIBase)
+    class MyGreatAsyncAPI(AsyncRapidAPIBase)
+
+    with deadline_scope(Deadline(30)):
+        await my_great_async_api.get_something()
 
 """
+import json
+import time
+import random
+import asyncio
+import logging
+import functools
+import contextlib
+import contextvars
+
+from typing import Dict, Optional
+
+import httpx
 import requests
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from base import ratelimit, circuitbreaker
+from lib import exceptions
+
+
+logger = logging.getLogger("api")
+
+
+def decode_json(content: bytes):
+    """Decodes a JSON response body.
+
+    It uses orjson if it's installed, which decodes right from the bytes and
+    is a few times faster than the json module on the large responses, such
+    as of the search for properties. Otherwise it falls back to the json.
+
+    Args:
+        content: a raw body of the response
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class Deadline:
+    """A point in time after which no requests should be made.
+
+    It's used to bound an overall time of a few consecutive requests, so that
+    each of the requests could use only the time left by the previous ones.
+
+    Attributes:
+        expires_at: a monotonic time after which the deadline is exceeded
+    """
+
+    def __init__(self, timeout: float, timer=time.monotonic):
+        """Init a deadline that expires in a timeout seconds from now."""
+        self._timer = timer
+        self.expires_at = timer() + timeout
+
+    def get_remaining(self) -> float:
+        """Returns how many seconds are left, zero if the deadline is exceeded."""
+        return max(self.expires_at - self._timer(), 0)
+
+    def extend(self, deadline: Optional["Deadline"]):
+        """Moves the deadline to another one if the other is later.
+
+        Args:
+            deadline: a deadline to extend to, the deadline never expires
+                if None
+        """
+        if deadline is None:
+            self.expires_at = float("inf")
+        else:
+            self.expires_at = max(self.expires_at, self._timer() + deadline.get_remaining())
+
+
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline_scope(deadline: Optional[Deadline]):
+    """Bounds the requests made within the context by the deadline.
+
+    Note:
+        the deadline is inherited by the tasks created within the context,
+        pass None to make requests without the deadline
+    """
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class _InflightRequest:
+    """An idempotent request shared by the callers making the identical ones.
+
+    Attributes:
+        task: a task making the request
+        deadline: a deadline the request is made within, the latest one of
+            the callers
+        waiters: an amount of the callers waiting for the response
+    """
+
+    def __init__(self, task: asyncio.Task, deadline: Deadline):
+        self.task = task
+        self.deadline = deadline
+        self.waiters = 0
+
+
+def _build_request_key(method: str, url: str, kwargs: dict) -> str:
+    """Builds a key identifying a request by its' method, url and arguments."""
+    return json.dumps([method, url, kwargs], sort_keys=True, default=str)
+
+
 class RapidAPIBase:
     """Base class for interacting with RapidAPIBase.
 
@@ -49,3 +166,353 @@ class RapidAPIBase:
                 }
 
         self._session.headers.update(headers)
+
+
+class AsyncRapidAPIBase:
+    """Base class for interacting with RapidAPI from asyncio code.
+
+    It's an asyncio-native counterpart of the RapidAPIBase. It uses httpx
+    library AsyncClient as a session, so that derived classes could be awaited
+    right from the telegram handlers without blocking the event loop.
+    Derived classes should make requests through the ._request coroutine
+    rather than using the session directly.
+
+    Each request is bounded by a timeout of its' endpoint and by the deadline
+    of the current context if there is one. Idempotent requests are retried
+    on the connection errors and on the retryable statuses with a jittered
+    exponential backoff. Concurrent identical idempotent requests of the same
+    priority are coalesced into a single upstream call, the result of which
+    is shared.
+    If a circuit breaker is given, the requests fail fast while the host
+    is failing.
+
+    Attributes:
+        timeouts: a dict of timeouts in seconds by the url path of an endpoint
+        default_timeout: a timeout of the endpoints not listed in timeouts
+        max_retries: how many times an idempotent request could be retried
+        backoff_base: a base delay in seconds of the exponential backoff
+        backoff_max: a maximum delay in seconds between the retries
+        retry_statuses: response statuses after which the request is retried
+
+        _api_key: a string containing key to be used with rapidapi
+        _api_host: a string containing host of the api to interact with
+        _session: an AsyncClient object from httpx library that is being used
+            as requests governor
+        _scheduler: a rate limit scheduler the requests wait in, it's
+            supposed to be shared by all the clients using the same api key
+        _inflight: a dict of the requests being made by their keys
+        _circuit_breaker: a circuit breaker of the api host
+
+    Note:
+        the session holds a connection pool, so make sure to await .aclose()
+        when the instance is no longer needed
+    """
+
+    timeouts: Dict[str, float] = {}
+    default_timeout = 10
+
+    max_retries = 2
+    backoff_base = 0.5
+    backoff_max = 4
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    def __init__(
+            self, 
+            api_key: str, 
+            api_host: str, 
+            scheduler: ratelimit.RateLimitScheduler = None,
+            circuit_breaker: circuitbreaker.CircuitBreaker = None,
+            ):
+        """Init class with api key and api host to be used with rapid api.
+
+        Args:
+            api_key: a string containing key to be used with rapidapi
+            api_host: a string containing host of the api to interact with
+            scheduler: a rate limit scheduler to make requests through, the
+                requests are not limited if not provided
+            circuit_breaker: a circuit breaker of the api host, the requests
+                never fail fast if not provided
+        """
+
+        self._api_key = api_key
+        self._api_host = api_host
+        self._scheduler = scheduler
+        self._circuit_breaker = circuit_breaker
+        self._inflight = {}
+
+        headers = {
+                "X-RapidAPI-Key": self._api_key,
+                "X-RapidAPI-Host": self._api_host
+                }
+
+        self._session = httpx.AsyncClient(headers=headers)
+
+    async def _request(
+            self, 
+            method: str, 
+            url: str, 
+            idempotent: bool = None, 
+            **kwargs
+            ) -> httpx.Response:
+        """Makes a request to the api and returns a successful response.
+
+        Args:
+            method: an HTTP method to be used, such as GET or POST
+            url: a full url to make a request to
+            idempotent: whether the request could be retried, by default
+                only GET requests are
+            kwargs: keyword arguments passed to the AsyncClient.request as is,
+                such as params or json
+
+        Raises:
+            lib.exceptions.RateLimitExceededException: if the request is
+                shed by the scheduler
+            lib.exceptions.CircuitOpenException: if the circuit of the host
+                is open
+            lib.exceptions.DeadlineExceededException: if the deadline of the
+                context is exceeded
+            lib.exceptions.RapidAPIRequestException: if the request failed
+            lib.exceptions.RapidAPIResponseException: if the api responded
+                with an error status
+
+        Note:
+            if an identical idempotent request of the same priority is
+            already being made, its' response is awaited instead of making a
+            new one, so the response object could be shared by a few callers
+            and must not be mutated, the shared request is cancelled once
+            none of its' callers is waiting for it
+        """
+        if idempotent is None:
+            idempotent = method == "GET"
+        if not idempotent:
+            return await self._request_through_breaker(method, url, idempotent, **kwargs)
+
+        deadline = _deadline.get()
+        # an interactive caller never joins a background request, which
+        # could be shed in favour of the interactive ones
+        key = (ratelimit.get_request_priority(), _build_request_key(method, url, kwargs))
+        while True:
+            if deadline is not None and deadline.get_remaining() <= 0:
+                raise exceptions.DeadlineExceededException
+
+            try:
+                return await self._join_inflight(key, deadline, method, url, **kwargs)
+            except exceptions.DeadlineExceededException:
+                # the shared request could be cut short by the deadline of
+                # the caller which made it, if it was joined by this one
+                # too late to extend it, then it's made once again
+                if deadline is not None and deadline.get_remaining() <= 0:
+                    raise
+                logger.debug("Remaking an in-flight request %s cut short by a deadline", key)
+
+    async def _join_inflight(
+            self, 
+            key: tuple, 
+            deadline: Optional[Deadline], 
+            method: str, 
+            url: str, 
+            **kwargs
+            ) -> httpx.Response:
+        """Awaits an in-flight idempotent request making it if there is none."""
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            # the shared request is made within the latest deadline of its'
+            # callers, which is extended by the ones joining it, so that it's
+            # not cut short by the caller which happened to make it
+            shared_deadline = Deadline(0)
+            shared_deadline.extend(deadline)
+            context = contextvars.copy_context()
+            context.run(_deadline.set, shared_deadline)
+            task = context.run(
+                    asyncio.ensure_future,
+                    self._request_through_breaker(method, url, True, **kwargs)
+                    )
+            inflight = _InflightRequest(task, shared_deadline)
+            task.add_done_callback(functools.partial(self._on_inflight_done, key, inflight))
+            self._inflight[key] = inflight
+        else:
+            inflight.deadline.extend(deadline)
+            logger.debug("Joined an in-flight request %s", key)
+
+        # the shared request is not cancelled with one of its' callers, but
+        # only once none of them is waiting for it, while each caller waits
+        # no longer than its' own deadline
+        inflight.waiters += 1
+        try:
+            if deadline is None:
+                return await asyncio.shield(inflight.task)
+            try:
+                return await asyncio.wait_for(
+                        asyncio.shield(inflight.task), 
+                        deadline.get_remaining()
+                        )
+            except asyncio.TimeoutError as e:
+                raise exceptions.DeadlineExceededException from e
+        finally:
+            inflight.waiters -= 1
+            if not inflight.waiters and not inflight.task.done():
+                # the identical requests made from now on don't join the
+                # cancelled one
+                self._inflight.pop(key, None)
+                inflight.task.cancel()
+
+    def _on_inflight_done(self, key: tuple, inflight: _InflightRequest, task: asyncio.Task):
+        """Forgets a finished in-flight request."""
+        if self._inflight.get(key) is inflight:
+            del self._inflight[key]
+
+        # retrieves the exception, so that it's not reported as unhandled
+        # when all the callers of the request were cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _request_through_breaker(
+            self, 
+            method: str, 
+            url: str, 
+            idempotent: bool, 
+            **kwargs
+            ) -> httpx.Response:
+        """Makes a request recording its' outcome in the circuit breaker."""
+        breaker = self._circuit_breaker
+        if breaker is None:
+            return await self._request_with_retries(method, url, idempotent, **kwargs)
+
+        breaker.before_call()
+        try:
+            r = await self._request_with_retries(method, url, idempotent, **kwargs)
+        except exceptions.RapidAPIRequestException:
+            breaker.record_failure()
+            raise
+        except exceptions.RapidAPIResponseException as e:
+            # client errors mean the host is alive, while rate limiting
+            # tells nothing about its' health
+            if e.status_code >= 500:
+                breaker.record_failure()
+            elif e.status_code == 429:
+                breaker.release()
+            else:
+                breaker.record_success()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+
+        breaker.record_success()
+        return r
+
+    async def _request_with_retries(
+            self, 
+            method: str, 
+            url: str, 
+            idempotent: bool, 
+            **kwargs
+            ) -> httpx.Response:
+        """Makes a request retrying it if it's idempotent, see _request."""
+        retries = self.max_retries if idempotent else 0
+        timeout = self.timeouts.get(httpx.URL(url).path, self.default_timeout)
+
+        for attempt in range(retries + 1):
+            is_last_attempt = attempt == retries
+            try:
+                r = await self._send(method, url, timeout, **kwargs)
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                if is_last_attempt:
+                    raise exceptions.RapidAPIRequestException(url, repr(e)) from e
+                await self._backoff(attempt)
+                continue
+
+            if r.status_code in self.retry_statuses and not is_last_attempt:
+                retry_after = ratelimit.parse_retry_after(r.headers.get("Retry-After"))
+                await self._backoff(attempt, min_delay=retry_after)
+                continue
+
+            if r.is_error:
+                raise exceptions.RapidAPIResponseException(url, r.status_code)
+            return r
+
+    async def _send(self, method: str, url: str, timeout: float, **kwargs) -> httpx.Response:
+        """Makes a single request bounded by the timeout and the deadline."""
+        # a timeout shortened by the deadline tells nothing about the host
+        deadline = _deadline.get()
+        is_bound_by_deadline = False
+        if deadline is not None:
+            is_bound_by_deadline = deadline.get_remaining() < timeout
+            timeout = min(timeout, deadline.get_remaining())
+            if timeout <= 0:
+                raise exceptions.DeadlineExceededException
+
+        if self._scheduler is not None:
+            started_at = time.monotonic()
+            # without the deadline the request is bound by the timeout of
+            # the endpoint, which is not a reason to give up on the search
+            try:
+                await asyncio.wait_for(self._scheduler.acquire(), timeout)
+            except asyncio.TimeoutError as e:
+                if is_bound_by_deadline:
+                    raise exceptions.DeadlineExceededException from e
+                raise exceptions.RateLimitExceededException(
+                        "no token within the timeout of the request"
+                        ) from e
+            timeout -= time.monotonic() - started_at
+            if timeout <= 0:
+                if is_bound_by_deadline:
+                    raise exceptions.DeadlineExceededException
+                raise exceptions.RateLimitExceededException(
+                        "no time left after waiting for a token"
+                        )
+
+        # httpx timeout bounds each of the network operations, while the whole
+        # request is bounded by the wait_for
+        try:
+            r = await asyncio.wait_for(
+                    self._session.request(method, url, timeout=timeout, **kwargs),
+                    timeout
+                    )
+        except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+            if is_bound_by_deadline:
+                raise exceptions.DeadlineExceededException from e
+            raise
+        if self._scheduler is not None:
+            self._scheduler.update_from_headers(r.headers, r.status_code)
+        return r
+
+    def _get_degraded(self, cache_, key, error: exceptions.CircuitOpenException):
+        """Returns an expired cached value to answer with while the circuit is open.
+
+        Args:
+            cache_: a cache the value could be found in, could be None
+            key: a key of the value in the cache
+            error: an exception to reraise if there is no such value
+
+        Raises:
+            lib.exceptions.CircuitOpenException: if there is no cached value
+        """
+        value = None
+        if cache_ is not None:
+            value, _ = cache_.get_stale(key)
+        if value is None:
+            raise error
+
+        logger.warning("%s, answering with a stale %s", error.message, key)
+        return value
+
+    async def _backoff(self, attempt: int, min_delay: float = 0):
+        """Sleeps before the next attempt with a full jitter exponential backoff.
+
+        Raises:
+            lib.exceptions.DeadlineExceededException: if the deadline of the
+                context would be exceeded by the time of the next attempt
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        delay = max(delay, min_delay)
+
+        deadline = _deadline.get()
+        if deadline is not None and delay >= deadline.get_remaining():
+            raise exceptions.DeadlineExceededException
+
+        await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """Closes the underlying session and its connections."""
+        await self._session.aclose()
@@ -0,0 +1,517 @@
+"""
+This module contains caches to be used by the api clients.
+
+By the moment of writing this comment it has next caches:
+    TTLCache
+
+And next storages the caches could keep their entries in:
+    MemoryStorage
+    SQLiteStorage
+
+
+Usage:
+    from base import cache
+    locations_cache = cache.TTLCache(maxsize=1024, ttl=60 * 60)
+    locations_cache.set("new york", locations)
+    locations = locations_cache.get("new york")
+
+    details_cache = cache.TTLCache(maxsize=1024, ttl=60 * 60, stale_ttl=24 * 60 * 60)
+    details, is_stale = details_cache.get_stale(property_id)
+
+    storage = cache.SQLiteStorage("cache.sqlite3", namespace="locations")
+    locations_cache = cache.TTLCache(ttl=60 * 60, storage=storage)
+
+"""
+import abc
+import time
+import zlib
+import pickle
+import sqlite3
+import logging
+import threading
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional, Tuple
+
+
+logger = logging.getLogger("cache")
+
+
+@dataclass
+class CacheEntry:
+    """A value stored in a cache.
+
+    Attributes:
+        value: a cached value
+        expires_at: a timestamp after which the value is considered expired
+        stale_until: a timestamp until which the expired value still could
+            be served as a stale one
+    """
+    value: Any
+    expires_at: float
+    stale_until: float
+
+    def is_expired(self, now: float) -> bool:
+        """Returns whether the entry is expired at the given timestamp."""
+        return now >= self.expires_at
+
+    def is_dead(self, now: float) -> bool:
+        """Returns whether the entry could not be served even as a stale one."""
+        return now >= self.stale_until
+
+
+class CacheStorage(abc.ABC):
+    """Base class for the storages of the cache entries.
+
+    A storage is only responsible for keeping entries and evicting them when
+    it's full, while the expiration is handled by the cache itself.
+
+    Attributes:
+        maxsize: a maximum amount of entries to be stored
+    """
+
+    maxsize: int
+
+    @abc.abstractmethod
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """Returns an entry stored by the key or None if there is no such."""
+
+    @abc.abstractmethod
+    def set(self, key: Hashable, entry: CacheEntry):
+        """Stores an entry by the key evicting other entries if needed."""
+
+    @abc.abstractmethod
+    def delete(self, key: Hashable):
+        """Removes an entry stored by the key if there is one."""
+
+    @abc.abstractmethod
+    def clear(self):
+        """Removes all the entries from the storage."""
+
+    @abc.abstractmethod
+    def __len__(self):
+        """Returns an amount of the stored entries."""
+
+
+class MemoryStorage(CacheStorage):
+    """A storage that keeps entries in the process memory.
+
+    When it's full the least recently used entries are evicted, the dead
+    ones are left to be evicted this way too.
+
+    Attributes:
+        maxsize: a maximum amount of entries to be stored
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """Init a storage with its' size."""
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: Hashable, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteStorage(CacheStorage):
+    """A storage that keeps entries in a local SQLite database.
+
+    The database is opened in the WAL mode, so that it could be shared by
+    multiple processes of the bot and survives restarts. Values are pickled
+    and compressed, and when the storage is full either by the amount of
+    entries or by their size, the least recently used ones are evicted.
+
+    The storage is called synchronously from the event loop, so the reads
+    don't write to the database: the access times and the entries failed to
+    load are kept in memory and written once the storage is checked for
+    being full, which is done every few sets only, so it could exceed its'
+    limits by a few entries. The dead entries are deleted then as well.
+
+    Attributes:
+        path: a path to the database file
+        namespace: a name that separates entries of different caches
+            sharing the same database
+        maxsize: a maximum amount of entries to be stored in the namespace
+        max_bytes: a maximum size of the values stored in the namespace
+        evict_every: how many sets to check the storage for being full once in
+
+    Note:
+        values are unpickled, so make sure the database is not writable by
+        anyone except the bot
+    """
+
+    def __init__(
+            self, 
+            path: str, 
+            namespace: str, 
+            maxsize: int = 1024, 
+            max_bytes: int = 64 * 1024 * 1024,
+            evict_every: int = 16
+            ):
+        """Init a storage and create its' table if there is none.
+
+        Args:
+            path: a path to the database file
+            namespace: a name that separates entries of different caches
+            maxsize: a maximum amount of entries to be stored in the namespace
+            max_bytes: a maximum size of the values stored in the namespace
+            evict_every: how many sets to check the storage for being full once in
+        """
+        self.path = path
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.evict_every = max(evict_every, 1)
+
+        # access times of the read entries by their keys, which are not
+        # written yet, keys of the entries failed to load, which are not
+        # deleted yet, and an amount of the sets since the last eviction
+        self._accessed = {}
+        self._unloadable = set()
+        self._sets_since_eviction = 0
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS cache_entries (
+                        namespace TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        value BLOB NOT NULL,
+                        size INTEGER NOT NULL,
+                        expires_at REAL NOT NULL,
+                        stale_until REAL NOT NULL,
+                        accessed_at REAL NOT NULL,
+                        PRIMARY KEY (namespace, key)
+                    )
+                    """
+                    )
+            self._connection.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS cache_entries_accessed_at
+                    ON cache_entries (namespace, accessed_at)
+                    """
+                    )
+
+    @staticmethod
+    def _dumps(value: Any) -> bytes:
+        """Serializes a value to be stored in the database."""
+        return zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+    @staticmethod
+    def _loads(data: bytes) -> Any:
+        """Deserializes a value stored in the database."""
+        return pickle.loads(zlib.decompress(data))
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            if repr(key) in self._unloadable:
+                return None
+
+            row = self._connection.execute(
+                    """
+                    SELECT value, expires_at, stale_until FROM cache_entries 
+                    WHERE namespace = ? AND key = ?
+                    """,
+                    (self.namespace, repr(key))
+                    ).fetchone()
+            if row is None:
+                return None
+
+            self._accessed[repr(key)] = time.time()
+
+        data, expires_at, stale_until = row
+        try:
+            value = self._loads(data)
+        except Exception:
+            # most likely the entry was stored by an older version of the bot
+            logger.warning("Failed to load %s from the cache", key, exc_info=True)
+            with self._lock:
+                self._accessed.pop(repr(key), None)
+                self._unloadable.add(repr(key))
+            return None
+
+        return CacheEntry(value=value, expires_at=expires_at, stale_until=stale_until)
+
+    def set(self, key: Hashable, entry: CacheEntry):
+        data = self._dumps(entry.value)
+        with self._lock, self._connection:
+            self._connection.execute(
+                    """
+                    INSERT OR REPLACE INTO cache_entries 
+                    (namespace, key, value, size, expires_at, stale_until, accessed_at) 
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        self.namespace, 
+                        repr(key), 
+                        data, 
+                        len(data), 
+                        entry.expires_at, 
+                        entry.stale_until, 
+                        time.time()
+                        )
+                    )
+            self._accessed.pop(repr(key), None)
+            self._unloadable.discard(repr(key))
+
+            self._sets_since_eviction += 1
+            if self._sets_since_eviction >= self.evict_every:
+                self._sets_since_eviction = 0
+                self._write_reads()
+                self._evict()
+
+    def _write_reads(self):
+        """Writes the access times of the read entries and deletes the unloadable ones.
+
+        Note:
+            should be called within a transaction
+        """
+        self._connection.executemany(
+                """
+                UPDATE cache_entries SET accessed_at = ? 
+                WHERE namespace = ? AND key = ?
+                """,
+                [
+                    (accessed_at, self.namespace, key)
+                    for key, accessed_at in self._accessed.items()
+                    ]
+                )
+        self._accessed.clear()
+
+        self._connection.executemany(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                [(self.namespace, key) for key in self._unloadable]
+                )
+        self._unloadable.clear()
+
+    def _evict(self):
+        """Evicts dead and then least recently used entries if full.
+
+        Note:
+            should be called within a transaction
+        """
+        self._connection.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND stale_until <= ?",
+                (self.namespace, time.time())
+                )
+        count, size = self._connection.execute(
+                """
+                SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries 
+                WHERE namespace = ?
+                """,
+                (self.namespace, )
+                ).fetchone()
+        if count <= self.maxsize and size <= self.max_bytes:
+            return
+
+        rows = self._connection.execute(
+                """
+                SELECT key, size FROM cache_entries WHERE namespace = ?
+                ORDER BY accessed_at
+                """,
+                (self.namespace, )
+                )
+        evicted = []
+        for key, entry_size in rows:
+            if count <= self.maxsize and size <= self.max_bytes:
+                break
+            evicted.append((self.namespace, key))
+            count -= 1
+            size -= entry_size
+
+        self._connection.executemany(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                evicted
+                )
+
+    def delete(self, key: Hashable):
+        with self._lock, self._connection:
+            self._accessed.pop(repr(key), None)
+            self._unloadable.discard(repr(key))
+            self._connection.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, repr(key))
+                    )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._accessed.clear()
+            self._unloadable.clear()
+            self._connection.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ?",
+                    (self.namespace, )
+                    )
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                    "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?",
+                    (self.namespace, )
+                    ).fetchone()[0]
+
+
+class TTLCache:
+    """A bounded cache with a time-to-live of the entries.
+
+    Entries are evicted either when they are expired or, if the cache is full,
+    in the least recently used order. Expired entries could be kept for
+    a while longer to be served as stale ones, while they are being
+    revalidated, see get_stale. The entries are kept in the process memory
+    unless another storage is provided.
+
+    Attributes:
+        maxsize: a maximum amount of entries to be stored
+        ttl: a default time-to-live of an entry in seconds
+        stale_ttl: for how long an expired entry could be served as a stale one
+        hits: an amount of lookups that were served from the cache
+        stale_hits: an amount of lookups that were served with stale values
+        misses: an amount of lookups that were not found or were expired
+
+    Note:
+        the cache doesn't copy the values, so make sure not to mutate
+        the values returned from it
+    """
+
+    def __init__(
+            self, 
+            maxsize: int = 1024, 
+            ttl: float = 60 * 60, 
+            stale_ttl: float = 0,
+            storage: CacheStorage = None,
+            timer=time.time
+            ):
+        """Init a cache with its' size and a default time-to-live.
+
+        Args:
+            maxsize: a maximum amount of entries to be stored, it's ignored
+                if the storage is provided
+            ttl: a default time-to-live of an entry in seconds
+            stale_ttl: for how long an expired entry could be served as a
+                stale one in seconds
+            storage: a storage to keep the entries in, MemoryStorage is used
+                if not provided
+            timer: a function returning a current timestamp in seconds
+        """
+        if storage is None:
+            storage = MemoryStorage(maxsize)
+
+        self.maxsize = storage.maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+        self._timer = timer
+        self._storage = storage
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns a value stored by the key or default if there is no such.
+
+        Args:
+            key: a key the value was stored by
+            default: a value to be returned if no fresh value is found
+        """
+        value, is_stale = self._lookup(key, default)
+        if is_stale:
+            self.misses += 1
+            return default
+        return value
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Tuple[Any, bool]:
+        """Returns a value stored by the key, even if it's a stale one.
+
+        Args:
+            key: a key the value was stored by
+            default: a value to be returned if neither a fresh, nor a stale
+                value is found
+
+        Returns:
+            a value and whether it's a stale one that should be revalidated
+        """
+        value, is_stale = self._lookup(key, default)
+        if is_stale:
+            self.stale_hits += 1
+        return value, is_stale
+
+    def _lookup(self, key: Hashable, default: Any) -> Tuple[Any, bool]:
+        """Looks up an entry and counts hits and misses.
+
+        The dead entries are not deleted here, as the lookups are made right
+        from the event loop, those are evicted by the storage itself.
+        """
+        entry = self._storage.get(key)
+        if entry is None:
+            self.misses += 1
+            return default, False
+
+        now = self._timer()
+        if entry.is_dead(now):
+            self.misses += 1
+            return default, False
+
+        if entry.is_expired(now):
+            return entry.value, True
+
+        self.hits += 1
+        return entry.value, False
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        """Stores a value by the key evicting the least recently used ones.
+
+        Args:
+            key: a key to store the value by
+            value: a value to be stored
+            ttl: a time-to-live of the value in seconds, the default one
+                of the cache is used if not provided
+        """
+        if ttl is None:
+            ttl = self.ttl
+
+        expires_at = self._timer() + ttl
+        entry = CacheEntry(
+                value=value, 
+                expires_at=expires_at,
+                stale_until=expires_at + self.stale_ttl
+                )
+        self._storage.set(key, entry)
+
+    def clear(self):
+        """Removes all the entries from the cache."""
+        self._storage.clear()
+
+    def stats(self) -> dict:
+        """Returns a dict with the hits, misses and size of the cache."""
+        return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "size": len(self._storage),
+                "maxsize": self.maxsize,
+                }
+
+    def __len__(self):
+        return len(self._storage)
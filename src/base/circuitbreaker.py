@@ -0,0 +1,126 @@
+"""
+This module contains a circuit breaker for the RapidAPI hosts.
+
+When a host starts failing, there is no point in making each request wait
+out the full failure, so after a few failures in a row the circuit is opened
+and the requests fail fast. After a while a few probe requests are let
+through, and if they succeed the circuit is closed again.
+
+Usage:
+    from base import circuitbreaker
+    breaker = circuitbreaker.CircuitBreaker(failure_threshold=5, recovery_timeout=30)
+    hotels_client = AsyncHotelsAPI(api_key="RAPID_API_KEY", circuit_breaker=breaker)
+
+"""
+import enum
+import time
+import logging
+
+from lib import exceptions
+
+
+logger = logging.getLogger("circuitbreaker")
+
+
+class CircuitStateEnum(enum.Enum):
+    """States of a circuit.
+
+    Attributes:
+        closed: requests are made as usual
+        open: requests fail fast without being made
+        half_open: a few probe requests are made to check the host recovered
+    """
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitBreaker:
+    """A circuit breaker of a single host.
+
+    Attributes:
+        name: a name of the circuit used in logs and exceptions, e.g: a host
+        failure_threshold: an amount of failures in a row that opens the circuit
+        recovery_timeout: for how long in seconds the circuit stays open
+            before the probe requests are let through
+        half_open_max_calls: an amount of the probe requests made at once
+    """
+
+    def __init__(
+            self,
+            name: str = "",
+            failure_threshold: int = 5,
+            recovery_timeout: float = 30,
+            half_open_max_calls: int = 1,
+            timer=time.monotonic,
+            ):
+        """Init a closed circuit.
+
+        Args:
+            name: a name of the circuit used in logs and exceptions, e.g: a host
+            failure_threshold: an amount of failures in a row that opens the circuit
+            recovery_timeout: for how long in seconds the circuit stays open
+            half_open_max_calls: an amount of the probe requests made at once
+            timer: a function returning a monotonic time in seconds
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._timer = timer
+        self._state = CircuitStateEnum.closed
+        self._failures = 0
+        self._opened_at = 0
+        self._half_open_calls = 0
+
+    @property
+    def state(self) -> CircuitStateEnum:
+        """A current state of the circuit."""
+        if (
+                self._state is CircuitStateEnum.open
+                and self._timer() - self._opened_at >= self.recovery_timeout
+                ):
+            self._state = CircuitStateEnum.half_open
+            self._half_open_calls = 0
+        return self._state
+
+    def before_call(self):
+        """Checks whether a request could be made, must precede each request.
+
+        Raises:
+            lib.exceptions.CircuitOpenException: if the circuit is open, or
+                it's half open and enough probe requests are being made
+        """
+        state = self.state
+        if state is CircuitStateEnum.open:
+            raise exceptions.CircuitOpenException(self.name)
+
+        if state is CircuitStateEnum.half_open:
+            if self._half_open_calls >= self.half_open_max_calls:
+                raise exceptions.CircuitOpenException(self.name)
+            self._half_open_calls += 1
+
+    def record_success(self):
+        """Records a successful request, closing the circuit."""
+        if self._state is not CircuitStateEnum.closed:
+            logger.info("Circuit %s is closed", self.name)
+        self._state = CircuitStateEnum.closed
+        self._failures = 0
+
+    def record_failure(self):
+        """Records a failed request, opening the circuit if needed."""
+        self._failures += 1
+        if self._state is CircuitStateEnum.half_open or self._failures >= self.failure_threshold:
+            if self._state is not CircuitStateEnum.open:
+                logger.warning("Circuit %s is open", self.name)
+            self._state = CircuitStateEnum.open
+            self._opened_at = self._timer()
+
+    def release(self):
+        """Records a request that ended with neither a success nor a failure.
+
+        E.g: a request that was cancelled, or was shed by the rate limiter.
+        """
+        if self._state is CircuitStateEnum.half_open and self._half_open_calls > 0:
+            self._half_open_calls -= 1
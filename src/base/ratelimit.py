@@ -0,0 +1,275 @@
+"""
+This module contains a rate limiting scheduler for the RapidAPI requests.
+
+The api key in RapidAPI is shared across all the apis it provides, so do the
+limits, that's why the scheduler is supposed to be shared by all the api
+clients using the same key.
+
+Usage:
+    from base import ratelimit
+    scheduler = ratelimit.RateLimitScheduler(rate=5, burst=5)
+    hotels_client = AsyncHotelsAPI(api_key="RAPID_API_KEY", scheduler=scheduler)
+
+    with ratelimit.request_priority(ratelimit.RequestPriorityEnum.background):
+        await hotels_client.get_meta_data()
+
+"""
+import enum
+import math
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import contextlib
+import contextvars
+
+from typing import Mapping, Optional
+from email.utils import parsedate_to_datetime
+
+from lib import exceptions
+
+
+logger = logging.getLogger("ratelimit")
+
+
+class RequestPriorityEnum(enum.IntEnum):
+    """Priorities of the requests, the lower the value the higher the priority.
+
+    Attributes:
+        interactive: requests a user is waiting for
+        background: requests refreshing the data in the background
+        warmup: requests preloading the data, e.g: on start
+    """
+    interactive = 0
+    background = 1
+    warmup = 2
+
+
+_request_priority = contextvars.ContextVar(
+        "request_priority",
+        default=RequestPriorityEnum.interactive
+        )
+
+
+@contextlib.contextmanager
+def request_priority(priority: RequestPriorityEnum):
+    """Sets a priority of the requests made within the context.
+
+    Note:
+        the priority is inherited by the tasks created within the context
+    """
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def get_request_priority() -> RequestPriorityEnum:
+    """Returns a priority of the requests made in the current context."""
+    return _request_priority.get()
+
+
+def parse_retry_after(value: Optional[str], default: float = 0) -> float:
+    """Returns a delay in seconds of the Retry-After header value.
+
+    The header is either an amount of seconds or an HTTP-date to retry after.
+
+    Args:
+        value: a value of the header, if any
+        default: a delay to return if there is no header or it's malformed
+    """
+    if value is None:
+        return default
+
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return default
+
+    if not math.isfinite(delay):
+        return default
+    return max(delay, 0)
+
+
+def _parse_quota(value: Optional[str]) -> Optional[int]:
+    """Returns a quota of the header value, None if there is none or it's malformed."""
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_seconds(value: Optional[str], default: float) -> float:
+    """Returns seconds of the header value, default if there is none or it's malformed."""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return default
+
+    if not math.isfinite(seconds) or seconds < 0:
+        return default
+    return seconds
+
+
+class RateLimitScheduler:
+    """A token bucket that schedules requests by their priority.
+
+    Requests wait for a token in the order of their priority, so that
+    interactive requests are never starved by the background ones. The
+    remaining quota is learnt from the X-RateLimit-* headers of the responses
+    and when it's running low, or the queue is too long, the low priority
+    requests are shed.
+
+    Attributes:
+        rate: an amount of tokens added per second
+        burst: a maximum amount of tokens the bucket could hold
+        max_queue: a queue depth after which the low priority requests are shed
+        quota_reserve: a remaining quota which is reserved for the interactive
+            requests only
+        remaining_quota: a remaining quota as reported by the api, None if unknown
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            burst: int,
+            max_queue: int = 100,
+            quota_reserve: int = 0,
+            timer=time.monotonic,
+            ):
+        """Init the scheduler with a full bucket.
+
+        Args:
+            rate: an amount of requests allowed per second
+            burst: an amount of requests allowed to be made at once
+            max_queue: a queue depth after which the low priority requests are shed
+            quota_reserve: a remaining quota which is reserved for the
+                interactive requests only
+            timer: a function returning a monotonic time in seconds
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.quota_reserve = quota_reserve
+        self.remaining_quota = None
+
+        self._quota_reset_at = None
+        self._timer = timer
+        self._tokens = burst
+        self._updated_at = timer()
+        self._paused_until = 0
+
+        self._waiters = []
+        self._counter = itertools.count()
+        self._condition = None
+
+    @property
+    def queue_depth(self) -> int:
+        """An amount of requests waiting for a token."""
+        return len(self._waiters)
+
+    def _refill(self):
+        """Adds the tokens accumulated since the last refill."""
+        now = self._timer()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _get_wait_time(self) -> float:
+        """Returns for how long to wait for a token, zero if there is one."""
+        now = self._timer()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._tokens >= 1:
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    def _check_shedding(self, priority: RequestPriorityEnum):
+        """Raises if a request of the priority should not be made at all."""
+        if self._quota_reset_at is not None and self._timer() >= self._quota_reset_at:
+            self.remaining_quota = None
+            self._quota_reset_at = None
+
+        if self.remaining_quota is not None and self.remaining_quota <= 0:
+            raise exceptions.RateLimitExceededException("quota is exhausted")
+
+        if priority is RequestPriorityEnum.interactive:
+            return
+
+        if self.remaining_quota is not None and self.remaining_quota <= self.quota_reserve:
+            raise exceptions.RateLimitExceededException(
+                    "quota is reserved for interactive requests"
+                    )
+        if self.queue_depth >= self.max_queue:
+            raise exceptions.RateLimitExceededException("queue is full")
+
+    async def acquire(self, priority: RequestPriorityEnum = None):
+        """Waits for a token to make a request.
+
+        Args:
+            priority: a priority of the request, the one of the current
+                context is used if not provided
+
+        Raises:
+            lib.exceptions.RateLimitExceededException: if the request is shed
+        """
+        if priority is None:
+            priority = get_request_priority()
+        self._check_shedding(priority)
+
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+
+        waiter = (priority, next(self._counter))
+        async with self._condition:
+            heapq.heappush(self._waiters, waiter)
+            if self.queue_depth > 1:
+                logger.debug("Request is queued, queue depth %s", self.queue_depth)
+
+            try:
+                while True:
+                    timeout = None
+                    if self._waiters[0] == waiter:
+                        self._refill()
+                        timeout = self._get_wait_time()
+                        if timeout <= 0:
+                            self._tokens -= 1
+                            heapq.heappop(self._waiters)
+                            return
+
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(self._condition.wait(), timeout)
+            except BaseException:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    heapq.heapify(self._waiters)
+                raise
+            finally:
+                self._condition.notify_all()
+
+    def update_from_headers(self, headers: Mapping[str, str], status_code: int = None):
+        """Learns the remaining quota from the response headers.
+
+        Args:
+            headers: headers of the api response
+            status_code: a status code of the api response, on 429 the
+                requests are paused for the Retry-After seconds
+        """
+        # malformed headers are ignored, as they tell nothing about the
+        # quota, while the response itself is fine
+        remaining = _parse_quota(headers.get("X-RateLimit-Requests-Remaining"))
+        if remaining is not None:
+            self.remaining_quota = remaining
+            # the quota is considered unknown after the reset, so that
+            # the requests are not shed forever
+            reset = _parse_seconds(headers.get("X-RateLimit-Requests-Reset"), default=60)
+            self._quota_reset_at = self._timer() + reset
+
+        if status_code == 429:
+            retry_after = parse_retry_after(headers.get("Retry-After"), default=1)
+            self._paused_until = max(self._paused_until, self._timer() + retry_after)
+            logger.warning("Rate limited, requests are paused for %s seconds", retry_after)
@@ -4,3 +4,83 @@ import os
 
 BOT_TOKEN = os.environ["TELEGRAM_BOT_TOKEN"]
 RAPIDAPI_TOKEN = os.environ["RAPIDAPI_TOKEN"]
+
+# base urls of the apis to override the real ones with, e.g: with a local
+# fake server from tools/fake_rapidapi.py
+HOTELS_API_BASE_URL = os.environ.get("HOTELS_API_BASE_URL")
+GEOCODING_API_BASE_URL = os.environ.get("GEOCODING_API_BASE_URL")
+
+# how many photos are sent with each hotel, at most 10 fit in a media group
+HOTEL_PHOTOS_COUNT = int(os.environ.get("HOTEL_PHOTOS_COUNT", 4))
+
+# how many hotels a user could ask for, which is also the size of the page of
+# properties requested from the hotels api
+MAX_HOTELS_COUNT = int(os.environ.get("MAX_HOTELS_COUNT", 25))
+
+# how many updates are handled at the same time, so that a slow search of one
+# chat doesn't hold up the others, 0 to handle them one by one
+CONCURRENT_UPDATES = int(os.environ.get("CONCURRENT_UPDATES", 256))
+
+# how many /properties/v2/detail requests could be made at the same time
+DETAILS_CONCURRENCY = int(os.environ.get("DETAILS_CONCURRENCY", 5))
+
+# rate limits shared by all the RapidAPI apis using the same key
+RAPIDAPI_RATE = float(os.environ.get("RAPIDAPI_RATE", 5))
+RAPIDAPI_BURST = int(os.environ.get("RAPIDAPI_BURST", 5))
+# a queue depth after which the background requests are shed
+RAPIDAPI_MAX_QUEUE = int(os.environ.get("RAPIDAPI_MAX_QUEUE", 100))
+# a remaining quota which is reserved for the requests users are waiting for
+RAPIDAPI_QUOTA_RESERVE = int(os.environ.get("RAPIDAPI_QUOTA_RESERVE", 50))
+
+# how many pages of properties one search for hotels could fetch, while there
+# are fewer hotels within the distance found than asked for
+SEARCH_MAX_PAGES = int(os.environ.get("SEARCH_MAX_PAGES", 3))
+# a size of the pages of properties ordered by the distance, all the hotels
+# within the distance are ranked locally, so those pages are larger
+SEARCH_DISTANCE_PAGE_SIZE = int(os.environ.get("SEARCH_DISTANCE_PAGE_SIZE", 50))
+
+# an overall time in seconds the api requests of one search for hotels could take
+SEARCH_DEADLINE = float(os.environ.get("SEARCH_DEADLINE", 30))
+
+# either "ranked" or "as_ready", see enums.DeliveryModeEnum
+HOTELS_DELIVERY_MODE = os.environ.get("HOTELS_DELIVERY_MODE", "ranked")
+
+# the hotels api supported countries are loaded from the snapshot on start
+# and refreshed in the background
+META_DATA_SNAPSHOT_PATH = os.environ.get("META_DATA_SNAPSHOT_PATH", "meta_data.json")
+META_DATA_REFRESH_INTERVAL = int(os.environ.get("META_DATA_REFRESH_INTERVAL", 24 * 60 * 60))
+
+# either "memory" or "sqlite", the latter survives restarts and could be
+# shared by multiple processes of the bot
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+CACHE_PATH = os.environ.get("CACHE_PATH", "cache.sqlite3")
+# a maximum size of the values of each cache in the sqlite backend
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# forward geocoding cache, found cities almost never change
+GEOCODING_CACHE_TTL = int(os.environ.get("GEOCODING_CACHE_TTL", 7 * 24 * 60 * 60))
+GEOCODING_CACHE_SIZE = int(os.environ.get("GEOCODING_CACHE_SIZE", 1024))
+
+# hotels api locations(city -> gaiaId) cache, stable for weeks
+LOCATIONS_CACHE_TTL = int(os.environ.get("LOCATIONS_CACHE_TTL", 7 * 24 * 60 * 60))
+LOCATIONS_CACHE_SIZE = int(os.environ.get("LOCATIONS_CACHE_SIZE", 1024))
+
+# properties details(address, images) cache, stale entries are served while
+# they are being refreshed in the background
+DETAILS_CACHE_TTL = int(os.environ.get("DETAILS_CACHE_TTL", 24 * 60 * 60))
+DETAILS_CACHE_STALE_TTL = int(os.environ.get("DETAILS_CACHE_STALE_TTL", 7 * 24 * 60 * 60))
+DETAILS_CACHE_SIZE = int(os.environ.get("DETAILS_CACHE_SIZE", 4096))
+
+# search for properties cache, the time-to-live is shortened for the searches
+# with a close check-in date
+SEARCH_CACHE_TTL = int(os.environ.get("SEARCH_CACHE_TTL", 30 * 60))
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", 256))
+
+# expired entries of the geocoding, locations and search caches are kept for
+# this long to answer with while the api is unavailable
+CACHE_DEGRADED_TTL = int(os.environ.get("CACHE_DEGRADED_TTL", 7 * 24 * 60 * 60))
+
+# circuit breakers of the api hosts, failures in a row to open the circuit
+# and seconds to wait before probing the host again
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_RECOVERY_TIMEOUT = int(os.environ.get("CIRCUIT_RECOVERY_TIMEOUT", 30))
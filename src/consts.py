@@ -6,3 +6,37 @@ PRICE_RANGE_FORMAT_RE = re.compile(r"^\d{1,}-\d{1,10}$")
 PRICE_RANGE_SEPARATOR = "-"
 BOOL_ANSWER = {"да": True, "нет": False}
 
+# spellings of the countries returned from the geocoding api that don't match
+# any of the names known to pycountry, keys are normalized(see countries module)
+COUNTRY_ALIASES = {
+        "russia": "RU",
+        "usa": "US",
+        "uk": "GB",
+        "great britain": "GB",
+        "england": "GB",
+        "scotland": "GB",
+        "wales": "GB",
+        "northern ireland": "GB",
+        "turkey": "TR",
+        "czech republic": "CZ",
+        "ivory coast": "CI",
+        "cape verde": "CV",
+        "brunei": "BN",
+        "macedonia": "MK",
+        "palestine": "PS",
+        "palestinian territories": "PS",
+        "vatican": "VA",
+        "vatican city": "VA",
+        "democratic republic of the congo": "CD",
+        "congo-brazzaville": "CG",
+        "congo-kinshasa": "CD",
+        "micronesia": "FM",
+        "the netherlands": "NL",
+        "the bahamas": "BS",
+        "the gambia": "GM",
+        "east timor": "TL",
+        "swaziland": "SZ",
+        "burma": "MM",
+        "kosovo": "XK",
+        }
+
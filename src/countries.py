@@ -0,0 +1,72 @@
+"""A module that resolves country names to their ISO codes.
+
+Country names come from the geocoding api in a small set of spellings, so
+instead of the fuzzy search over all the countries on each request, names
+are looked up in an index precomputed from pycountry and the known aliases.
+The fuzzy search is used only as a fallback for the unknown spellings.
+
+Usage:
+    import countries
+    country_code = countries.find_country_code("United States")
+"""
+
+import functools
+import unicodedata
+
+from typing import Dict
+
+import pycountry
+
+import consts
+
+
+_COUNTRY_NAME_ATTRIBUTES = ("name", "official_name", "common_name", "alpha_2", "alpha_3")
+
+
+def normalize_country_name(name: str) -> str:
+    """Normalizes a country name to be looked up in the index.
+
+    E.g: " Côte d'Ivoire" is normalized to "cote d'ivoire"
+    """
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    return " ".join(name.split()).casefold()
+
+
+@functools.lru_cache(maxsize=None)
+def get_country_index() -> Dict[str, str]:
+    """Builds an index of normalized country names to their ISO alpha-2 codes.
+
+    Note:
+        the index is built once on the first call
+    """
+    index = {}
+    for country in pycountry.countries:
+        for attribute in _COUNTRY_NAME_ATTRIBUTES:
+            name = getattr(country, attribute, None)
+            if name:
+                index[normalize_country_name(name)] = country.alpha_2
+
+    index.update(consts.COUNTRY_ALIASES)
+    return index
+
+
+@functools.lru_cache(maxsize=256)
+def _search_country_code_fuzzy(name: str) -> str:
+    """Searches for a country code with the pycountry fuzzy search."""
+    return pycountry.countries.search_fuzzy(name)[0].alpha_2
+
+
+def find_country_code(name: str) -> str:
+    """Finds an ISO alpha-2 code of a country by its' name.
+
+    Args:
+        name: a name of the country, e.g: United States, Russia
+
+    Raises:
+        LookupError: if no country was found by the name
+    """
+    try:
+        return get_country_index()[normalize_country_name(name)]
+    except KeyError:
+        return _search_country_code_fuzzy(name)
@@ -2,6 +2,8 @@
 import enum
 import functools
 
+from lib import batches
+
 class StatesEnum(enum.Enum):
     """States in which the converation with user can be."""
 
@@ -25,23 +27,60 @@ class DealsCommandTypeEnum(enum.Enum):
         """Returns a list of commands in a way to register them as commands."""
         return [entity.value for entity in cls]
 
+class DeliveryModeEnum(enum.Enum):
+    """Order in which the found hotels are delivered to the user.
+
+    Attributes:
+        ranked: hotels are sent one after another in the ranked order
+        as_ready: hotels are sent as soon as their details are obtained
+    """
+    ranked = "ranked"
+    as_ready = "as_ready"
+
+class SearchStrategyEnum(enum.Enum):
+    """Order in which the hotels are queried from the api page by page.
+
+    Attributes:
+        by_price: pages are ordered by the price, and end as soon as enough
+        hotels within the distance are found
+        by_distance: pages are ordered by the distance, and end as soon as
+        the hotels go beyond the distance, so that all the hotels within it
+        are ranked locally
+    """
+    by_price = "by_price"
+    by_distance = "by_distance"
+
+    @classmethod
+    def from_deals_command_type(cls, command_type: DealsCommandTypeEnum):
+        """Returns a search strategy based on a command type."""
+        if command_type is DealsCommandTypeEnum.best_deal:
+            return cls.by_distance
+        return cls.by_price
+
 class HotelsSorterFunctionsEnum(enum.Enum):
-    """Sorting functions enumeration."""
+    """Sorting functions enumeration.
+
+    Each function takes a batch of the found properties and a limit of
+    the hotels to select, and returns the first of them in the ranked
+    order, see lib.batches.PropertyBatch.sort_by.
+    """
 
     high_price_sorted = functools.partial(
-            sorted, 
-            key=lambda prop: prop.price.price, 
+            batches.PropertyBatch.sort_by, 
+            names=("price",), 
             reverse=True
             )
 
     low_price_sorted = functools.partial(
-            sorted, 
-            key=lambda prop: prop.price.price
+            batches.PropertyBatch.sort_by, 
+            names=("price",)
             )
 
+    # ranked by the trade-off of the price and the distance, see
+    # lib.batches.PropertyBatch.rank_best_deals
     best_deal_sorted = functools.partial(
-            sorted, 
-            key=lambda prop: prop.price.price and prop.distance_from_downtown.distance
+            batches.PropertyBatch.rank_best_deals, 
+            weights=(1, 1)
             )
 
     @classmethod
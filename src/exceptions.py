@@ -8,6 +8,12 @@ class BotValidationException(BotException):
     pass
 
 
+class ServiceUnavailableException(BotException):
+    """An api the bot relies on is unavailable or failed to respond."""
+
+    message = "Сервис отелей временно недоступен, попробуйте позже."
+
+
 class CityNotFoundException(BotValidationException):
     """City not found with a given name."""
 
@@ -39,6 +45,14 @@ class NotZeroValueException(BotValidationException):
 
     message = "Число не может быть нулём или меньше нуля."
 
+class TooBigValueException(BotValidationException):
+    """A value that was provided is bigger than the maximum one."""
+
+    def __init__(self, max_value):
+        self.max_value = max_value
+        self.message = "Число не может быть больше {0}.".format(max_value)
+        super().__init__(self.message)
+
 class WrongDateFormatException(WrongTextMessageFormatException):
     """A string is not in compliance with a format."""
 
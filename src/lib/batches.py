@@ -0,0 +1,343 @@
+"""A module that provides a columnar batch of the found properties.
+
+The properties are ranked by a few of their values only, such as the price
+and the distance, so those are stored column by column next to the
+properties. The sorting and the filtering run over the columns and select
+the rows, while the properties are copied only for the selected rows once
+they are iterated over.
+
+The columns are numpy arrays if numpy is installed, which makes the ranking
+vectorized, otherwise they are the arrays of the array module.
+
+Usage:
+    from lib import batches
+    properties = batches.PropertyBatch(found_properties)
+    properties = properties.filter_range("distance", max_value=5)
+    for prop in properties.sort_by(("price",), limit=10):
+        print(prop.name)
+"""
+
+import copy
+import heapq
+import array
+import bisect
+import dataclasses
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from lib import models
+
+
+def _get_id(prop: models.PropertyDataclass) -> int:
+    return int(prop.id)
+
+
+def _get_price(prop: models.PropertyDataclass) -> float:
+    return float(prop.price.price)
+
+
+def _get_distance(prop: models.PropertyDataclass) -> float:
+    return float(prop.distance_from_downtown.get_kilometers())
+
+
+def _get_lat(prop: models.PropertyDataclass) -> float:
+    return float(prop.coordinates.lat)
+
+
+def _get_long(prop: models.PropertyDataclass) -> float:
+    return float(prop.coordinates.long)
+
+
+# a name of the column, a getter of its' value from a property and a type
+# code of the array, the distance is always in kilometers
+COLUMNS = (
+        ("id", _get_id, "q"),
+        ("price", _get_price, "d"),
+        ("distance", _get_distance, "d"),
+        ("lat", _get_lat, "d"),
+        ("long", _get_long, "d"),
+        )
+
+
+def _build_column(values: Iterable, typecode: str, count: int):
+    if numpy is not None:
+        return numpy.fromiter(values, dtype=typecode, count=count)
+    return array.array(typecode, values)
+
+
+class PropertyBatch:
+    """Found properties with their ranked values stored in columns.
+
+    A batch is immutable, each of the sort_by, filter_range and head returns
+    a new batch, which shares the properties and the columns with the
+    original one and differs by the selected rows only.
+
+    Attributes:
+        properties: all the properties of the batch, selected or not
+        columns: arrays of the values of the properties by the column names,
+            those are id, price, distance(in km), lat and long
+        indices: indices of the selected rows in the ranked order
+        is_stale: whether the properties are taken from an expired cache,
+            the iterated copies are marked with it
+    """
+
+    def __init__(self, properties: Sequence[models.PropertyDataclass], is_stale: bool = False):
+        """Init the batch building the columns of the properties.
+
+        Args:
+            properties: properties to build the batch of, all of them are selected
+            is_stale: whether the properties are taken from an expired cache
+        """
+        self.properties = list(properties)
+        self.is_stale = is_stale
+
+        count = len(self.properties)
+        self.columns: Dict[str, Sequence] = {
+                name: _build_column(map(getter, self.properties), typecode, count)
+                for name, getter, typecode in COLUMNS
+                }
+        self.indices = numpy.arange(count) if numpy is not None else list(range(count))
+
+    @classmethod
+    def concat(cls, batches: Sequence["PropertyBatch"]) -> "PropertyBatch":
+        """Joins the selected rows of the batches into a new batch.
+
+        The columns are joined as they are, without building them from the
+        properties once again, e.g: to rank the pages of a search together.
+
+        Args:
+            batches: batches to join in the order of the rows, the joined
+                batch is stale if any of them is
+        """
+        batch = cls([])
+        batch.is_stale = any(batch_.is_stale for batch_ in batches)
+        for batch_ in batches:
+            batch.properties.extend(batch_.properties[index] for index in batch_.indices)
+
+        for name, _, typecode in COLUMNS:
+            if numpy is not None:
+                batch.columns[name] = numpy.concatenate(
+                        [batch.columns[name]] + [batch_.get_column(name) for batch_ in batches]
+                        )
+            else:
+                for batch_ in batches:
+                    batch.columns[name].extend(batch_.get_column(name))
+
+        count = len(batch.properties)
+        batch.indices = numpy.arange(count) if numpy is not None else list(range(count))
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __iter__(self) -> Iterator[models.PropertyDataclass]:
+        """Iterates over copies of the selected properties in the ranked order.
+
+        Note:
+            the copies could be updated with the info safely, as the
+            properties of the batch are shared with the cache
+        """
+        for index in self.indices:
+            yield dataclasses.replace(self.properties[index], is_stale=self.is_stale)
+
+    def _select(self, indices: Sequence[int]) -> "PropertyBatch":
+        batch = copy.copy(self)
+        batch.indices = indices
+        return batch
+
+    def get_column(self, name: str) -> Sequence:
+        """Returns values of a column of the selected rows in the ranked order."""
+        column = self.columns[name]
+        if numpy is not None:
+            return column[self.indices]
+        return [column[index] for index in self.indices]
+
+    def filter_range(
+            self,
+            name: str,
+            min_value: float = None,
+            max_value: float = None
+            ) -> "PropertyBatch":
+        """Selects the rows with a value of a column within a range.
+
+        Args:
+            name: a name of the column to filter by
+            min_value: a minimum value inclusive, not bound if None
+            max_value: a maximum value inclusive, not bound if None
+        """
+        column = self.columns[name]
+        if numpy is not None:
+            values = column[self.indices]
+            mask = numpy.ones(len(values), dtype=bool)
+            if min_value is not None:
+                mask &= values >= min_value
+            if max_value is not None:
+                mask &= values <= max_value
+            return self._select(self.indices[mask])
+
+        return self._select([
+            index for index in self.indices
+            if (min_value is None or column[index] >= min_value)
+            and (max_value is None or column[index] <= max_value)
+            ])
+
+    def sort_by(
+            self, 
+            names: Sequence[str], 
+            reverse: bool = False, 
+            limit: int = None
+            ) -> "PropertyBatch":
+        """Orders the selected rows by the values of the columns.
+
+        The sorting is stable, so the rows with the same values keep the
+        order they had, e.g: the order of the api. If only the first rows
+        are needed, those are selected without sorting the rest of them.
+
+        Args:
+            names: names of the columns to sort by, the next one is used
+                to order the rows with the same values of the previous one
+            reverse: whether to sort in the descending order
+            limit: how many of the first rows to keep, all if None
+        """
+        if limit is not None:
+            limit = max(int(limit), 0)
+            if limit >= len(self.indices):
+                limit = None
+
+        columns = [self.columns[name] for name in names]
+        if numpy is not None:
+            # lexsort sorts by the last key first, and the descending order
+            # is the ascending one of the negated values
+            indices = self.indices
+            keys = [column[indices] for column in reversed(columns)]
+            if reverse:
+                keys = [-key for key in keys]
+            if limit is not None and limit > 0:
+                # only the rows up to the limit-th value of the first key
+                # could get into the first rows, including the ties of it
+                primary = keys[-1]
+                candidates = primary <= numpy.partition(primary, limit - 1)[limit - 1]
+                indices = indices[candidates]
+                keys = [key[candidates] for key in keys]
+            return self._select(indices[numpy.lexsort(keys)[:limit]])
+
+        if len(columns) == 1:
+            key = columns[0].__getitem__
+        else:
+            key = lambda index: tuple(column[index] for column in columns)
+        if limit is not None:
+            # both are equivalent to the sorted(...)[:limit], but keep a heap
+            # of the limit size only
+            select = heapq.nlargest if reverse else heapq.nsmallest
+            return self._select(select(limit, self.indices, key=key))
+        return self._select(sorted(self.indices, key=key, reverse=reverse))
+
+    def rank_best_deals(
+            self, 
+            limit: int = None, 
+            weights: Tuple[float, float] = (1, 1)
+            ) -> "PropertyBatch":
+        """Orders the selected rows by the trade-off of the price and the distance.
+
+        The rows are ranked by the Pareto layers first. The first layer is the
+        skyline of the rows, those which no other row is both cheaper and
+        closer than, the second one is the skyline of the rest, and so on.
+        The rows of the same layer are ordered by a weighted sum of their
+        price and distance scaled to 0..1 over the selected rows.
+
+        The layers are found in O(n log n): the rows are visited from the
+        cheapest one, and each is put into the first layer, which last row
+        is farther than it, as the last rows are the closest ones of their
+        layers, so the layer is found with a binary search.
+
+        Args:
+            limit: how many of the first rows to keep, all if None
+            weights: weights of the price and the distance in the score of
+                the rows of the same layer, e.g: (2, 1) to prefer the cheaper
+                hotels to the closer ones
+        """
+        prices = self.get_column("price")
+        distances = self.get_column("distance")
+        if numpy is not None:
+            order = numpy.lexsort((distances, prices)).tolist()
+            # the rows are visited one by one, which is faster on the lists
+            price_values, distance_values = prices.tolist(), distances.tolist()
+        else:
+            # two stable sorts by a single key are faster than one by a tuple
+            order = sorted(range(len(prices)), key=distances.__getitem__)
+            order.sort(key=prices.__getitem__)
+            price_values, distance_values = prices, distances
+
+        if limit is not None:
+            limit = max(int(limit), 0)
+
+        # distances of the last rows of the layers, which never decrease
+        # from a layer to the next one, and layers of the ranked rows in
+        # the order of the price
+        fronts = []
+        layers = {}
+        last_price = last_distance = last_layer = None
+        for row in order:
+            price, distance = price_values[row], distance_values[row]
+            if price == last_price and distance == last_distance:
+                # the same rows don't dominate each other
+                layer = last_layer
+            else:
+                layer = bisect.bisect_right(fronts, distance)
+            last_price, last_distance, last_layer = price, distance, layer
+
+            # a row of the layer beyond the limit couldn't get into the
+            # first rows, as each of the layers before has a row at least
+            if layer is None or (limit is not None and layer >= limit):
+                last_layer = None
+                continue
+            if layer == len(fronts):
+                fronts.append(distance)
+            else:
+                fronts[layer] = distance
+            layers[row] = layer
+
+        if not layers:
+            return self._select(self.indices[:0])
+
+        price_weight, distance_weight = weights
+        min_price, min_distance = min(price_values), min(distance_values)
+        price_range = (max(price_values) - min_price) or 1
+        distance_range = (max(distance_values) - min_distance) or 1
+
+        if numpy is not None:
+            rows = numpy.fromiter(layers, dtype=numpy.intp, count=len(layers))
+            scores = (
+                    price_weight * (prices[rows] - min_price) / price_range
+                    + distance_weight * (distances[rows] - min_distance) / distance_range
+                    )
+            ranks = numpy.fromiter(layers.values(), dtype=numpy.intp, count=len(layers))
+            ranked = rows[numpy.lexsort((scores, ranks))[:limit]]
+            return self._select(self.indices[ranked])
+
+        scores = {
+                row: price_weight * (prices[row] - min_price) / price_range
+                + distance_weight * (distances[row] - min_distance) / distance_range
+                for row in layers
+                }
+        ranked = sorted(layers, key=scores.__getitem__)
+        ranked.sort(key=layers.__getitem__)
+        return self._select([self.indices[row] for row in ranked[:limit]])
+
+    def head(self, count: int) -> "PropertyBatch":
+        """Selects the first count of the selected rows."""
+        return self._select(self.indices[:int(count)])
+
+    def mark_stale(self) -> "PropertyBatch":
+        """Returns the same batch, which properties are marked as stale."""
+        batch = copy.copy(self)
+        batch.is_stale = True
+        return batch
+
+    def to_properties(self) -> List[models.PropertyDataclass]:
+        """Returns copies of the selected properties in the ranked order."""
+        return list(self)
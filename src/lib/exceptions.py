@@ -11,6 +11,87 @@ class RapidAPIException(Exception):
     an api request."""
 
 
+class RapidAPIRequestException(RapidAPIException):
+    """An exception represents that a request failed to be made.
+
+    It's raised on the connection errors and timeouts, after all the retries
+    were made.
+
+    Attributes:
+        url: a string representing an url the request was made to
+        message: full message containing formatted message of the exception
+    """
+
+    def __init__(self, url: str, reason: str):
+        """Init an exception with the url and the reason of the failure."""
+        self.url = url
+
+        self.message = "Request to {0} failed: {1}".format(self.url, reason)
+        super().__init__(self.message)
+
+
+class RapidAPIResponseException(RapidAPIException):
+    """An exception represents that the api responded with an error status.
+
+    Attributes:
+        url: a string representing an url the request was made to
+        status_code: an HTTP status code of the response
+        message: full message containing formatted message of the exception
+    """
+
+    def __init__(self, url: str, status_code: int):
+        """Init an exception with the url and the status code of the response."""
+        self.url = url
+        self.status_code = status_code
+
+        self.message = "Request to {0} responded with {1}".format(self.url, self.status_code)
+        super().__init__(self.message)
+
+
+class DeadlineExceededException(RapidAPIException):
+    """An exception represents that there is no time left to make a request.
+
+    Attributes:
+        message: full message containing formatted message of the exception
+    """
+
+    def __init__(self):
+        self.message = "Deadline exceeded"
+        super().__init__(self.message)
+
+
+class RateLimitExceededException(RapidAPIException):
+    """An exception represents that a request was shed by the rate limiter.
+
+    Attributes:
+        reason: a string representing why the request was shed
+        message: full message containing formatted message of the exception
+    """
+
+    def __init__(self, reason: str):
+        """Init an exception with the reason the request was shed."""
+        self.reason = reason
+
+        self.message = "Request is shed by the rate limiter: {0}".format(self.reason)
+        super().__init__(self.message)
+
+
+class CircuitOpenException(RapidAPIException):
+    """An exception represents that a request failed fast as the host is failing.
+
+    Attributes:
+        host: a string representing a host the circuit of which is open
+        message: full message containing formatted message of the exception
+    """
+
+    def __init__(self, host: str):
+        """Init an exception with the host the circuit of which is open."""
+        self.host = host
+
+        self.message = "Circuit of {0} is open".format(self.host)
+        super().__init__(self.message)
+
+
 class HotelsAPIException(RapidAPIException):
     """Base exception that represents an exception happened in during handling
     an api request in Hotels api."""
@@ -9,20 +9,22 @@ Usage:
     city: models.CityLocationDataclass
     city = geocoding_client.forward_geocoding("New York")
 
+    async_geocoding_client = geocoding.AsyncGeocodingAPI("your rapid api key")
+    city = await async_geocoding_client.forward_geocoding("New York")
+
 """
 
 import logging
 
 from typing import List
-from dataclasses import dataclass
 
-from lib import models
-from base import api
+from lib import models, exceptions
+from base import api, cache, ratelimit, circuitbreaker
 
 
 logger = logging.getLogger("geocoding")
 
-@dataclass
+@models.slotted_dataclass(frozen=True)
 class GeocodingLocationDataclass(models.CityLocationDataclass):
     """A data store derived from models.CityLocationDataclass to store API specific data.
 
@@ -74,6 +76,14 @@ def _parse_locations_from_geocoding(response: dict):
         ret.append(location_d)
     return ret
 
+def _normalize_city(city: str) -> str:
+    """Normalizes a city name to be used as a cache key.
+
+    E.g: "Moscow", " moscow " and "MOSCOW" are all normalized to "moscow"
+    """
+    return " ".join(city.split()).casefold()
+
+
 class GeocodingAPI(api.RapidAPIBase):
     """A class wrapper around a Forward & Reverse Geooding API from RapidAPI.
 
@@ -145,4 +155,94 @@ class GeocodingAPI(api.RapidAPIBase):
                   }
         r = self._session.get(url, params=params)
         return _parse_locations_from_geocoding(r.json())
-        
+
+
+class AsyncGeocodingAPI(api.AsyncRapidAPIBase):
+    """An asyncio-native wrapper around a Forward & Reverse Geooding API from RapidAPI.
+
+    It's an awaitable counterpart of the GeocodingAPI that shares the same
+    parsing routines. Found cities could be cached, so that the same city
+    typed in a different manner costs only one API call. While the circuit
+    of the host is open, the expired cached cities are answered with instead.
+
+    Attributes:
+        base_url: a class defined string url to be used to query API from
+        host: a class defined string representing host to be used in RapidAPI
+        locale: a class defined string representing a locale 
+        specification(IBM; ISO-639, ISO-3166) to be used in API responses.
+    """
+
+    base_url = GeocodingAPI.base_url
+    host = GeocodingAPI.host
+    locale = GeocodingAPI.locale
+
+    timeouts = {"/v1/forward": 5}
+
+    def __init__(
+            self, 
+            api_key: str, 
+            cache_: cache.TTLCache = None,
+            scheduler: ratelimit.RateLimitScheduler = None,
+            circuit_breaker: circuitbreaker.CircuitBreaker = None,
+            base_url: str = None,
+            ):
+        """Init a class with RapidAPI user-application API key.
+
+        Args:
+            api_key: a RapidAPI user-application API key
+            cache_: a cache to store found cities in, they are not cached if
+                not provided
+            scheduler: a rate limit scheduler to make requests through
+            circuit_breaker: a circuit breaker of the geocoding api host
+            base_url: a base url to override the class defined one with,
+                e.g: of a local fake server
+        """
+        if base_url is not None:
+            self.base_url = base_url
+        super().__init__(
+                api_key=api_key, 
+                api_host=self.host, 
+                scheduler=scheduler,
+                circuit_breaker=circuit_breaker
+                )
+        self._cache = cache_
+
+    async def forward_geocoding(
+            self,
+            city: str,
+            **kwargs,
+            ) -> List[models.CityLocationDataclass]:
+        """Returns a list of cities found from forward geocoding.
+
+        See GeocodingAPI.forward_geocoding for the details.
+
+        Args:
+            city: a string containing a city to search for
+
+        Note:
+            cached results are looked up by a normalized city name, so that
+            the letter case and extra spaces don't matter
+        """
+
+        cache_key = (_normalize_city(city), tuple(sorted(kwargs.items())))
+        if self._cache is not None:
+            cities = self._cache.get(cache_key)
+            if cities is not None:
+                logger.debug("Found %s in the cache", cache_key)
+                return list(cities)
+
+        url = "{0}/v1/forward".format(self.base_url)
+        params = {
+                "city": city,
+                "accept-language": self.locale,
+                **kwargs
+                  }
+        try:
+            r = await self._request("GET", url, params=params)
+        except exceptions.CircuitOpenException as e:
+            return list(self._get_degraded(self._cache, cache_key, e))
+        cities = _parse_locations_from_geocoding(api.decode_json(r.content))
+
+        if self._cache is not None:
+            self._cache.set(cache_key, cities)
+        return list(cities)
@@ -10,18 +10,26 @@ Usage:
     locations: models.LocationDataclass
     locations = hotels_client.search_locations("New York")
 
+    async_hotels_client = AsyncHotelsAPI(api_key="RAPID_API_KEY")
+    locations = await async_hotels_client.search_locations("New York")
+
 """
 
+import json
+import asyncio
+import hashlib
+import itertools
 import logging
-from typing import List, Dict
+import dataclasses
+from typing import List, Dict, AsyncGenerator
 from decimal import Decimal
 from enum import Enum
 from dataclasses import dataclass
 from collections import ChainMap
-from datetime import datetime
+from datetime import datetime, date
 
-from lib import models
-from base import api
+from lib import models, batches, exceptions
+from base import api, cache, ratelimit, circuitbreaker
 
 logger = logging.getLogger('api')
 logging.basicConfig(
@@ -173,7 +181,7 @@ class HotelsCheckpoint:
             get invalid responses from the API.
         """
 
-        return self.__dict__
+        return dataclasses.asdict(self)
 
     @classmethod
     def from_datetime(cls, datetime_: datetime):
@@ -220,7 +228,7 @@ class HotelsRooms:
             a list of of human types and their amount that are going to live
             in a property, for now only one element containing info about adults
         """
-        return [self.__dict__]
+        return [dataclasses.asdict(self)]
 
 
 class EnumHotelsSort(Enum):
@@ -232,7 +240,7 @@ class EnumHotelsSort(Enum):
         price_asc: sorting by price ascending
         price_relevant: sorting by price ascending(?) and platform recommendations
         review: sort by by guest rating descending(?)
-        distance: sort by distance descending(?)
+        distance: sort by distance from the destination, the nearest first
         stars: sort by count of hotel stars descending(?)
         recommended: sort by the recommendations of the platform
 
@@ -278,7 +286,7 @@ class HotelsPriceFilter(HotelsFilter, models.PriceFilter):
     @classmethod
     def from_generic_price_filter(cls, filter_: models.PriceFilter):
         """Creates an instance of this dataclass from the generic price filter."""
-        return cls(**filter_.__dict__)
+        return cls(**dataclasses.asdict(filter_))
 
 
 def generic_search_filter_adapter(filter_: models.SearchFilter) -> HotelsFilter:
@@ -559,6 +567,49 @@ def _build_payload_for_hotels_search(
 
     return payload
 
+# (days left until the check-in, time-to-live of the search results in seconds)
+# the closer the check-in is, the faster the prices and availability change
+_SEARCH_CACHE_TTLS = (
+        (1, 2 * 60),
+        (7, 10 * 60),
+        )
+
+
+def _build_search_cache_key(query: dict) -> str:
+    """Builds a canonical key of the search for properties query.
+
+    The key doesn't depend on the order of the keys in the query, so that
+    the same searches built in a different way share the same key.
+
+    Args:
+        query: a dict as built by HotelsPropertySearchDataclass.build_query_dict
+    """
+    canonical = json.dumps(query, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _get_search_cache_ttl(
+        check_in: HotelsCheckpoint, 
+        default: float, 
+        today: date = None
+        ) -> float:
+    """Returns a time-to-live of search results depending on the check-in date.
+
+    Args:
+        check_in: a check-in date of the search
+        default: a time-to-live to be used for the distant check-in dates
+        today: a date to count the days from, today if not provided
+    """
+    if today is None:
+        today = date.today()
+
+    days_left = (date(check_in.year, check_in.month, check_in.day) - today).days
+    for days, ttl in _SEARCH_CACHE_TTLS:
+        if days_left <= days:
+            return min(ttl, default)
+    return default
+
+
 def _update_property_with_address(response: dict, property: models.PropertyDataclass):
     """Updates property address from the /details/ response from hotels api.
 
@@ -584,6 +635,72 @@ def _update_property_with_images_links(response: dict, property: models.Property
 
 
 
+@dataclass
+class HotelsPropertyDetailsDataclass:
+    """Information about a property obtained from the /details/ API call.
+
+    It's nearly static for each property, so it's safe to be cached.
+
+    Attributes:
+        address: a string representing an address of the property
+        images_links: a list of links to the property images
+        images_limit: a maximum amount of images the links were parsed
+            with, None if all of them were
+    """
+    address: str
+    images_links: List[str]
+    images_limit: int = None
+
+    def has_images(self, images_count: int = None) -> bool:
+        """Returns whether there are all the images links needed.
+
+        Args:
+            images_count: an amount of images needed, None if all of them
+        """
+        if self.images_limit is None:
+            return True
+        if images_count is None:
+            return False
+        return images_count <= self.images_limit
+
+
+def _parse_property_details(
+        response: dict, 
+        images_count: int = None
+        ) -> HotelsPropertyDetailsDataclass:
+    """Parses the /details/ response from hotels api into the dataclass.
+
+    Args:
+        response: a decoded response of the /details/
+        images_count: an amount of the first images to parse, there could be
+            hundreds of them in the gallery, None to parse all of them
+    """
+    property_info = response["data"]["propertyInfo"]
+    address = property_info["summary"]["location"]["address"]["addressLine"]
+    images = itertools.islice(property_info["propertyGallery"]["images"], images_count)
+    images_links = [image["image"]["url"] for image in images]
+
+    return HotelsPropertyDetailsDataclass(
+            address=address, 
+            images_links=images_links, 
+            images_limit=images_count
+            )
+
+
+def _update_property_with_details(
+        details: HotelsPropertyDetailsDataclass, 
+        property: models.PropertyDataclass
+        ):
+    """Updates property with the parsed /details/ data.
+
+    Note:
+        updates the original property dataclass as an intended effect
+    """
+    property.address = details.address
+    property.images_links = list(details.images_links)
+    return property
+
+
 def _update_property_with_data(response: dict, property: models.PropertyDataclass):
     """Updates property with the /details/ data.
 
@@ -700,3 +817,318 @@ class HotelsAPI(api.RapidAPIBase):
 
 
 
+
+
+class AsyncHotelsAPI(api.AsyncRapidAPIBase):
+    """Provides awaitable methods to interact with hotels.com API from RapidAPI.
+
+    It's an asyncio-native counterpart of the HotelsAPI, it shares the same
+    parsing routines and differs only in the way requests are being made.
+    Found locations could be cached as long as they are stable for weeks, 
+    as well as the properties details, which could be served stale while
+    they are being refreshed in the background. Searches for properties
+    could be cached for a short time, so that the same searches made within
+    minutes cost only one API call. While the circuit of the host is open,
+    the expired cached searches and locations are answered with instead,
+    such properties are marked as stale.
+
+    Attributes:
+        locale: a string representing a locale to be used in searches in ISO format
+        e.g: en_US, ru_RU, en_GB, and so on
+
+        currency: a currency to be used in return from the APIs calls, e.g: USD, RUB, ...
+
+        base_url: a base url that would be added into every request
+        host: a host that is needed for the RapidAPI to distinguish where to route request to
+    """
+    locale = HotelsAPI.locale
+    currency = HotelsAPI.currency
+
+    base_url = HotelsAPI.base_url
+    host = HotelsAPI.host
+
+    timeouts = {
+            "/properties/v2/list": 15,
+            "/properties/v2/detail": 8,
+            "/locations/v3/search": 5,
+            "/v2/get-meta-data": 10,
+            }
+
+    def __init__(
+            self, 
+            api_key: str, 
+            locations_cache: cache.TTLCache = None,
+            details_cache: cache.TTLCache = None,
+            search_cache: cache.TTLCache = None,
+            scheduler: ratelimit.RateLimitScheduler = None,
+            circuit_breaker: circuitbreaker.CircuitBreaker = None,
+            base_url: str = None,
+            ):
+        """Init the class with api key and api host from the class definition.
+
+        Args:
+            api_key: a RapidAPI user-application API key
+            locations_cache: a cache to store found locations in, they are
+                not cached if not provided
+            details_cache: a cache to store properties details in, they are
+                not cached if not provided
+            search_cache: a cache to store found properties in, they are
+                not cached if not provided
+            scheduler: a rate limit scheduler to make requests through
+            circuit_breaker: a circuit breaker of the hotels api host
+            base_url: a base url to override the class defined one with,
+                e.g: of a local fake server
+        """
+        if base_url is not None:
+            self.base_url = base_url
+        super().__init__(
+                api_key=api_key, 
+                api_host=self.host, 
+                scheduler=scheduler,
+                circuit_breaker=circuit_breaker
+                )
+        self._locations_cache = locations_cache
+        self._details_cache = details_cache
+        self._search_cache = search_cache
+
+        self._details_refreshes = {}
+
+    async def update_property_with_info(
+            self, 
+            prop: models.PropertyDataclass,
+            images_count: int = None,
+            ) -> models.PropertyDataclass:
+        """Obtains info about a property from its' id and adds additional info.
+
+        See HotelsAPI.update_property_with_info for the details.
+
+        Args:
+            prop: a dataclass that represents a property
+            images_count: an amount of the first images links to obtain,
+                None to obtain all of them
+
+        Note:
+            it updates the original property. If the details of the property
+            are cached, but stale, those are used anyway and are refreshed
+            in the background. If the cached details have fewer images than
+            needed, those are fetched once again
+        """
+        cache_key = (prop.id, self.locale)
+        fallback = None
+        if self._details_cache is not None:
+            details, is_stale = self._details_cache.get_stale(cache_key)
+            if details is not None and not details.has_images(images_count):
+                # could still be used while the api is unavailable
+                fallback, details = details, None
+            elif is_stale:
+                self._refresh_property_details(prop, details.images_limit)
+            if details is not None:
+                return _update_property_with_details(details, prop)
+
+        try:
+            details = await self._fetch_property_details(prop, images_count)
+        except exceptions.CircuitOpenException:
+            if fallback is None:
+                raise
+            details = fallback
+        return _update_property_with_details(details, prop)
+
+    async def _fetch_property_details(
+            self, 
+            prop: models.PropertyDataclass,
+            images_count: int = None,
+            ) -> HotelsPropertyDetailsDataclass:
+        """Requests the details of a property and puts them into the cache."""
+        url = "{0}/properties/v2/detail".format(self.base_url)
+        payload = {
+                "currency": prop.price.currency.get_code(),
+                "locale": self.locale,
+                "propertyId": prop.id
+                }
+        r = await self._request("POST", url, idempotent=True, json=payload)
+        details = _parse_property_details(api.decode_json(r.content), images_count)
+
+        if self._details_cache is not None:
+            self._details_cache.set((prop.id, self.locale), details)
+        return details
+
+    def _refresh_property_details(self, prop: models.PropertyDataclass, images_count: int = None):
+        """Schedules a background refresh of the property details.
+
+        Note:
+            only one refresh per property is made at a time
+        """
+        cache_key = (prop.id, self.locale)
+        if cache_key in self._details_refreshes:
+            return
+
+        def _on_done(task):
+            del self._details_refreshes[cache_key]
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(
+                        "Failed to refresh details of %s", 
+                        cache_key, 
+                        exc_info=task.exception()
+                        )
+
+        # the refresh is not bound by the deadline of the search it's made from
+        background = ratelimit.request_priority(ratelimit.RequestPriorityEnum.background)
+        with background, api.deadline_scope(None):
+            task = asyncio.ensure_future(self._fetch_property_details(prop, images_count))
+        task.add_done_callback(_on_done)
+        self._details_refreshes[cache_key] = task
+
+    async def search_properties(
+            self, 
+            search_dataclass: HotelsPropertySearchDataclass
+            ) -> List[models.PropertyDataclass]:
+        """Searches for properties listed in the hotels.com.
+
+        See HotelsAPI.search_properties for the details.
+
+        Args:
+            search_dataclass: a dataclass that consists all the filled info
+            about the search such as dates, price filter, amount of persons
+            and so on
+
+        Note:
+            the returned properties are copies of the cached ones, so that
+            they could be updated with the info safely
+        """
+        properties = await self.search_property_batch(search_dataclass)
+        return properties.to_properties()
+
+    async def search_property_batch(
+            self, 
+            search_dataclass: HotelsPropertySearchDataclass
+            ) -> batches.PropertyBatch:
+        """Searches for properties and returns them as a columnar batch.
+
+        The batch is what is cached, so that the found properties could be
+        ranked without building their columns once again on each cache hit.
+
+        Args:
+            search_dataclass: a dataclass that consists all the filled info
+            about the search such as dates, price filter, amount of persons
+            and so on
+
+        Note:
+            the batch is shared with the cache, its' properties are copied
+            once they are iterated over
+        """
+
+        query = search_dataclass.build_query_dict()
+        cache_key = _build_search_cache_key(query)
+        properties = None
+        if self._search_cache is not None:
+            properties = self._search_cache.get(cache_key)
+
+        if properties is not None:
+            logger.debug("Found search %s in the cache", cache_key)
+            return properties
+
+        url = "{0}/properties/v2/list".format(self.base_url)
+        try:
+            r = await self._request("POST", url, idempotent=True, json=query)
+        except exceptions.CircuitOpenException as e:
+            properties = self._get_degraded(self._search_cache, cache_key, e)
+            return properties.mark_stale()
+        properties = batches.PropertyBatch(
+                _parse_properties_response_into_dataclasses(api.decode_json(r.content))
+                )
+
+        if self._search_cache is not None:
+            ttl = _get_search_cache_ttl(
+                    search_dataclass.check_in, 
+                    default=self._search_cache.ttl
+                    )
+            self._search_cache.set(cache_key, properties, ttl=ttl)
+        return properties
+
+    async def iter_properties(
+            self, 
+            search_dataclass: HotelsPropertySearchDataclass,
+            max_pages: int = None
+            ) -> AsyncGenerator[batches.PropertyBatch, None]:
+        """Searches for properties page by page and yields the pages lazily.
+
+        The pages are of the result_limit size starting from the result_offset
+        of the search. The next page is requested as soon as the current one
+        is yielded, so that it's fetched while the current one is filtered.
+        Hence the iteration should be stopped as soon as enough properties
+        are found, which cancels the prefetched page.
+
+        Args:
+            search_dataclass: a dataclass that consists all the filled info
+            about the search, the first page to be fetched is defined by it
+            max_pages: a maximum amount of pages to fetch, not bound if None
+
+        Note:
+            the pages end with the first page shorter than the result_limit,
+            as there are no more properties found
+        """
+        page = asyncio.ensure_future(self.search_property_batch(search_dataclass))
+        pages_count = 1
+        try:
+            while page is not None:
+                properties = await page
+                page = None
+
+                offset = search_dataclass.result_offset + search_dataclass.result_limit
+                has_more = len(properties) >= search_dataclass.result_limit
+                if has_more and (max_pages is None or pages_count < max_pages):
+                    search_dataclass = dataclasses.replace(search_dataclass, result_offset=offset)
+                    page = asyncio.ensure_future(self.search_property_batch(search_dataclass))
+                    pages_count += 1
+                yield properties
+        finally:
+            if page is not None and not page.cancel() and not page.cancelled():
+                # the prefetched page is done already, and its' error, if
+                # any, is not going to be awaited
+                page.exception()
+
+    async def search_locations(
+            self, 
+            query: str,
+            locale: str = None
+            ) -> List[models.LocationDataclass]:
+        """Gets all the locations(cities, hotels) for the given query.
+
+        See HotelsAPI.search_locations for the details.
+
+        Args:
+            query: a string representing a location to search for, for example: New York, Dallas, ...
+            locale: an ISO locale to be used in response such as ru_RU, en_GB, en_US
+        """
+
+        if locale is None:
+            locale = self.locale
+
+        cache_key = (query, locale)
+        if self._locations_cache is not None:
+            locations = self._locations_cache.get(cache_key)
+            if locations is not None:
+                logger.debug("Found %s in the cache", cache_key)
+                return list(locations)
+
+        url = "{0}/locations/v3/search".format(self.base_url)
+        try:
+            r = await self._request("GET", url, params={"q": query, "locale": locale})
+        except exceptions.CircuitOpenException as e:
+            return list(self._get_degraded(self._locations_cache, cache_key, e))
+
+        response = api.decode_json(r.content)
+        logger.debug(response)
+        locations = _parse_locations_response_into_dataclasses(response)
+
+        if self._locations_cache is not None:
+            self._locations_cache.set(cache_key, locations)
+        return list(locations)
+
+    async def get_meta_data(self) -> Dict[str, HotelsCountryInfoDataclass]:
+        """Gets info about the countries supported by the API."""
+        url = "{0}/v2/get-meta-data".format(self.base_url)
+        logger.debug(url)
+        r = await self._request("GET", url)
+
+        return _parse_countries_into_dataclasses(api.decode_json(r.content))
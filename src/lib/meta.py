@@ -0,0 +1,181 @@
+"""Module that provides the meta data of the Hotels.com API.
+
+The meta data is a map of the countries supported by the API, it barely ever
+changes, so instead of querying it on each start it's kept in a local
+snapshot file which is loaded lazily and refreshed in the background.
+
+Usage:
+    from lib import hotels, meta
+    meta_data = meta.HotelsMetaData(
+            client=hotels.AsyncHotelsAPI(api_key="RAPID_API_KEY"),
+            snapshot_path="meta_data.json"
+            )
+    country_info = meta_data["US"]
+
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import dataclasses
+
+from collections.abc import Mapping
+from typing import Dict, Iterator, Optional
+
+from lib import hotels
+from base import ratelimit
+
+
+logger = logging.getLogger("meta")
+
+
+class HotelsMetaData(Mapping):
+    """Countries supported by the hotels api indexed by their ISO codes.
+
+    It behaves as a read-only dict, where keys are ISO country codes and
+    values are HotelsCountryInfoDataclass. The countries are loaded from the
+    snapshot file on the first access, and the snapshot is refreshed from
+    the API with refresh or run_refreshes.
+
+    Attributes:
+        snapshot_path: a path to the JSON snapshot file of the countries
+
+    Note:
+        if there is no snapshot or it's broken, the meta data is empty until
+        it's refreshed, and the snapshot is read again only once the file
+        is changed until then, see is_loaded
+    """
+
+    def __init__(self, client: hotels.AsyncHotelsAPI, snapshot_path: str):
+        """Init the meta data with a client to refresh it with and a snapshot path.
+
+        Args:
+            client: a hotels api client to get the meta data from
+            snapshot_path: a path to the JSON snapshot file of the countries
+        """
+        self.snapshot_path = snapshot_path
+
+        self._client = client
+        self._countries = None
+        # whether the snapshot failed to load and a modification time of
+        # the file then, None if there was no file
+        self._has_snapshot_failed = False
+        self._failed_snapshot_mtime = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the countries are known, either from the snapshot or the API."""
+        return bool(self._get_countries())
+
+    def _get_countries(self) -> Dict[str, hotels.HotelsCountryInfoDataclass]:
+        """Returns the countries loading them from the snapshot if needed."""
+        # a missing snapshot is looked for again, as it could be saved by
+        # another process, or the countries could be refreshed later
+        if self._countries is None:
+            self._countries = self._load_snapshot()
+        return self._countries or {}
+
+    def _load_snapshot(self) -> Optional[Dict[str, hotels.HotelsCountryInfoDataclass]]:
+        """Loads the countries from the snapshot file, None if there is none.
+
+        A truncated or an outdated snapshot is treated as a missing one. The
+        snapshot failed to load is not read again until the file is changed.
+        """
+        try:
+            mtime = os.path.getmtime(self.snapshot_path)
+        except OSError:
+            mtime = None
+        if self._has_snapshot_failed and mtime == self._failed_snapshot_mtime:
+            return None
+
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            countries = {
+                    code: hotels.HotelsCountryInfoDataclass(**info)
+                    for code, info in snapshot.items()
+                    }
+        except FileNotFoundError:
+            logger.warning("No meta data snapshot found at %s", self.snapshot_path)
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            logger.warning(
+                    "Failed to load the meta data snapshot at %s", 
+                    self.snapshot_path, 
+                    exc_info=True
+                    )
+        else:
+            self._has_snapshot_failed = False
+            return countries
+
+        self._has_snapshot_failed = True
+        self._failed_snapshot_mtime = mtime
+        return None
+
+    def _save_snapshot(self, countries: Dict[str, hotels.HotelsCountryInfoDataclass]):
+        """Saves the countries into the snapshot file atomically."""
+        snapshot = {code: dataclasses.asdict(info) for code, info in countries.items()}
+
+        tmp_path = "{0}.tmp".format(self.snapshot_path)
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def get_snapshot_age(self) -> float:
+        """Returns an age of the snapshot in seconds, infinity if there is none."""
+        try:
+            return time.time() - os.path.getmtime(self.snapshot_path)
+        except FileNotFoundError:
+            return float("inf")
+
+    async def refresh(self):
+        """Gets the countries from the API and saves them into the snapshot."""
+        countries = await self._client.get_meta_data()
+        self._save_snapshot(countries)
+        self._countries = countries
+        logger.info("Meta data is refreshed, %s countries", len(countries))
+
+    async def ensure_loaded(self):
+        """Loads the countries, refreshing them if there is no snapshot.
+
+        Note:
+            failures of the refresh are logged, not raised, so that the bot
+            could start without the API being available
+        """
+        try:
+            if self._get_countries():
+                return
+
+            with ratelimit.request_priority(ratelimit.RequestPriorityEnum.warmup):
+                await self.refresh()
+        except Exception:
+            logger.exception("Failed to load the meta data")
+
+    async def run_refreshes(self, interval: float, retry_interval: float = 60):
+        """Refreshes the snapshot periodically, supposed to be run as a task.
+
+        Args:
+            interval: how often to refresh the snapshot in seconds
+            retry_interval: how soon to retry a failed refresh in seconds
+        """
+        delay = max(interval - self.get_snapshot_age(), 0)
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                with ratelimit.request_priority(ratelimit.RequestPriorityEnum.background):
+                    await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh the meta data")
+                delay = retry_interval
+            else:
+                delay = interval
+
+    def __getitem__(self, code: str) -> hotels.HotelsCountryInfoDataclass:
+        return self._get_countries()[code]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._get_countries())
+
+    def __len__(self) -> int:
+        return len(self._get_countries())
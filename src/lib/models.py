@@ -3,12 +3,67 @@
 The models here could be used internally by the library, as well as externally
 to refer to the same entities across the project.
 """
+import dataclasses
+
 from enum import Enum
 from decimal import Decimal
 from dataclasses import dataclass
 from typing import List
 
 
+def _get_slots_state(self) -> dict:
+    return {field.name: getattr(self, field.name) for field in dataclasses.fields(self)}
+
+
+def _set_slots_state(self, state):
+    for name, value in state.items():
+        # frozen dataclasses forbid the regular setattr
+        object.__setattr__(self, name, value)
+
+
+def slotted_dataclass(cls=None, **kwargs):
+    """A dataclass decorator that adds __slots__ to the class.
+
+    The slotted objects don't have a per-instance __dict__, which roughly
+    halves the memory of the small models kept alive in the caches. It's a
+    backport of the dataclass(slots=True) of python 3.10.
+
+    Args:
+        cls: a class to turn into a slotted dataclass
+        kwargs: keyword arguments passed to the dataclass as is, e.g: frozen
+
+    Note:
+        a slotted dataclass can't be derived from a non slotted one, as
+        the instances would get a __dict__ anyway, and its' fields are not
+        available as class attributes, e.g: to get the defaults
+    """
+    def wrap(cls):
+        cls = dataclass(cls, **kwargs)
+
+        inherited_slots = set()
+        for base in cls.__mro__[1:-1]:
+            inherited_slots.update(getattr(base, "__slots__", ()))
+
+        field_names = tuple(field.name for field in dataclasses.fields(cls))
+        cls_dict = dict(cls.__dict__)
+        cls_dict["__slots__"] = tuple(name for name in field_names if name not in inherited_slots)
+        for name in field_names:
+            # the defaults are kept by the __init__, and would conflict with the slots
+            cls_dict.pop(name, None)
+        cls_dict.pop("__dict__", None)
+        cls_dict.pop("__weakref__", None)
+        cls_dict["__getstate__"] = _get_slots_state
+        cls_dict["__setstate__"] = _set_slots_state
+
+        slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+        slotted_cls.__qualname__ = cls.__qualname__
+        return slotted_cls
+
+    if cls is None:
+        return wrap
+    return wrap(cls)
+
+
 class EnumCurrency(Enum):
     """Currency info.
     
@@ -66,7 +121,7 @@ class EnumDistanceUnit(Enum):
     Mile = "MILE"
     Kilometer = "KILOMETER"
 
-@dataclass
+@slotted_dataclass(frozen=True)
 class DistanceDataclass:
     """Information about a distance in decimal and the unit.
 
@@ -89,7 +144,7 @@ class DistanceDataclass:
         elif self.unit is EnumDistanceUnit.Mile:
             return self.distance * 1.60934
 
-@dataclass
+@slotted_dataclass(frozen=True)
 class PriceDataclass:
     """Information about a price.
 
@@ -104,7 +159,7 @@ class PriceDataclass:
         """Returns a formatted string with the price and its' code."""
         return "{0}{1}".format(float(self.price), self.currency.get_code())
 
-@dataclass
+@slotted_dataclass(frozen=True)
 class CoordinatesDataclass:
     """Coordinates information.
 
@@ -130,7 +185,7 @@ class LocationTypeEnum(Enum):
     multiregion = "MULTIREGION"
 
 
-@dataclass
+@slotted_dataclass(frozen=True)
 class LocationDataclass:
     """Location info.
 
@@ -146,7 +201,7 @@ class LocationDataclass:
     
     coordinates: CoordinatesDataclass
 
-@dataclass
+@slotted_dataclass(frozen=True)
 class CityLocationDataclass(LocationDataclass):
     """City location information.
 
@@ -157,7 +212,7 @@ class CityLocationDataclass(LocationDataclass):
     """
     country: str
 
-@dataclass
+@slotted_dataclass
 class PropertyDataclass:
     """Property information.
 
@@ -170,6 +225,8 @@ class PropertyDataclass:
         distance_from_downtown: a distance dataclass that has information about
         the distance from the downtown to the property
         coordinates: a dataclass that represents coordinates of the property
+        is_stale: whether the info is taken from an expired cache, as the
+        api was unavailable
     """
     id: int
 
@@ -182,6 +239,8 @@ class PropertyDataclass:
     images_links: List[str] = None
     address: str = None
 
+    is_stale: bool = False
+
 
 
 @dataclass
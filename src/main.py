@@ -1,5 +1,6 @@
 import os
 import enum
+import asyncio
 import json
 import logging
 from datetime import datetime
@@ -25,7 +26,7 @@ import validators
 import enums
 import exceptions
 
-from lib import models
+from lib import models, exceptions as lib_exceptions
 
 # NOTICE: models should be generic, probably move models to some other place
 # the main catch here is to do not use any implementation of the lib, but
@@ -45,6 +46,7 @@ async def deals_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     command = enums.DealsCommandTypeEnum(update.message.text.replace("/", ""))
     context.user_data["sort_function"] = enums.HotelsSorterFunctionsEnum.from_deals_command_type(command)
+    context.user_data["search_strategy"] = enums.SearchStrategyEnum.from_deals_command_type(command)
     logger.debug(context.user_data)
     await context.bot.send_message(
             chat_id=update.effective_chat.id, 
@@ -55,9 +57,9 @@ async def deals_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    city = services.search_city(update.message.text)
+    city = await services.search_city(update.message.text)
     validators.validate_country_supported_from_city(city)
-    city = services.search_hotels_city(city)
+    city = await services.search_hotels_city(city)
     context.user_data["city"] = city
 
 
@@ -96,7 +98,11 @@ async def handle_checkout(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def handle_hotels_count(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    hotels_count = validators.validate_float(update.message.text)
+    # the count is also the size of the page of properties, hence it's bound
+    hotels_count = validators.validate_int(
+            update.message.text, 
+            max_value=config.MAX_HOTELS_COUNT
+            )
     if hotels_count <= 0:
         raise exceptions.NotZeroValueException
 
@@ -158,25 +164,31 @@ async def handle_load_photos(update: Update, context: ContextTypes.DEFAULT_TYPE)
     load_photos = user_data["load_photos"]
     max_distance_downtown = user_data["distance_downtown"]
     sort_function = user_data["sort_function"]
+    search_strategy = user_data["search_strategy"]
+
+    delivery_mode = enums.DeliveryModeEnum(config.HOTELS_DELIVERY_MODE)
+    ordered = delivery_mode is enums.DeliveryModeEnum.ranked
 
     _filters = [models.PriceFilter(min_price=min_price, max_price=max_price)]
     hotels_d = services.search_hotels(
             city=city,
             hotels_count=hotels_count,
             max_distance_downtown=max_distance_downtown,
-            photos_count=hotels_count,
+            photos_count=config.HOTEL_PHOTOS_COUNT if load_photos else 0,
             check_in=check_in,
             check_out=check_out,
             filters=_filters,
             sort_function=sort_function.value,
+            strategy=search_strategy,
             result_limit=hotels_count,
+            ordered=ordered,
             )
 
 
     async def send_plain_message(bot, property):
-        property_message = services.build_message_from_property_dataclass(hotel)
+        property_message = services.build_message_from_property_dataclass(property)
         logger.debug(property_message)
-        return await context.bot.send_message(
+        return await bot.send_message(
             chat_id=update.effective_chat.id, 
             text=property_message,
             parse_mode=ParseMode.HTML
@@ -184,13 +196,9 @@ async def handle_load_photos(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 
     
-    async def send_mediagroup(bot, property, amount=3):
-        property_message = services.build_message_from_property_dataclass(hotel)
-        media_group = []
-        for i, image_link in enumerate(property.images_links):
-            if i > amount:
-                break
-            media_group.append(InputMediaPhoto(image_link))
+    async def send_mediagroup(bot, property, amount=config.HOTEL_PHOTOS_COUNT):
+        property_message = services.build_message_from_property_dataclass(property)
+        media_group = [InputMediaPhoto(image_link) for image_link in property.images_links[:amount]]
         logger.debug(media_group)
 
         return await bot.send_media_group(
@@ -201,10 +209,34 @@ async def handle_load_photos(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 )
 
 
-    send_message_func = send_mediagroup if load_photos else send_plain_message
-
-    for hotel in hotels_d:
-        await send_message_func(context.bot, hotel)
+    async def send_hotel(bot, property):
+        # the photos of a hotel could be missing while the api is unavailable
+        if load_photos and property.images_links:
+            return await send_mediagroup(bot, property)
+        return await send_plain_message(bot, property)
+
+
+    # in the ranked mode hotels are sent one after another to keep the order
+    # in the chat, otherwise each hotel is sent as soon as it's ready without
+    # waiting for the previous sends to complete
+    sends = []
+    try:
+        async for hotel in hotels_d:
+            if ordered:
+                await send_hotel(context.bot, hotel)
+            else:
+                sends.append(asyncio.create_task(send_hotel(context.bot, hotel)))
+    except asyncio.CancelledError:
+        for send in sends:
+            send.cancel()
+        raise
+    except BaseException:
+        # the hotels found before the search failed are still sent, and
+        # failures of their sends don't mask the one of the search
+        await asyncio.gather(*sends, return_exceptions=True)
+        raise
+
+    await asyncio.gather(*sends)
         
     return ConversationHandler.END
 
@@ -215,9 +247,22 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             exc_info=context.error
             )
 
+    if not isinstance(update, Update) or update.effective_chat is None:
+        return
+
+    error = context.error
+    if isinstance(error, lib_exceptions.RapidAPIException):
+        error = exceptions.ServiceUnavailableException()
+
+    # not every exception has a message meant for the user
+    if isinstance(error, exceptions.BotException):
+        text = getattr(error, "message", messages.UNKNOWN_ERROR_MESSAGE)
+    else:
+        text = messages.UNKNOWN_ERROR_MESSAGE
+
     await context.bot.send_message(
             chat_id=update.effective_chat.id, 
-            text=context.error.message
+            text=text
             )
 
 async def stop_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -239,10 +284,14 @@ async def help_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text=messages.HELP_MESSAGE
     )
 
-if __name__ == "__main__":
+async def startup_handler(app):
+    await services.start_background_tasks(app)
 
-    app = ApplicationBuilder().token(config.BOT_TOKEN).build()
+async def shutdown_handler(app):
+    await services.close_clients()
 
+def add_handlers(app):
+    """Registers the handlers of the conversations with the user in the app."""
     just_text_filter = filters.TEXT & (~ filters.COMMAND)
     deals_commands = enums.DealsCommandTypeEnum.as_commands_list()
     logger.debug(deals_commands)
@@ -259,13 +308,22 @@ if __name__ == "__main__":
         },
         fallbacks=[CommandHandler(deals_commands, deals_handler), CommandHandler("stop", stop_handler)],
     )
-    start_handler = CommandHandler("start", start_handler)
-    help_handler = CommandHandler('help', help_handler)
-    app.add_handler(help_handler)
-    app.add_handler(start_handler)
+    app.add_handler(CommandHandler('help', help_handler))
+    app.add_handler(CommandHandler("start", start_handler))
     app.add_handler(conv_handler)
     app.add_error_handler(error_handler)
 
-    app.run_polling()
 
+if __name__ == "__main__":
+
+    app = (
+            ApplicationBuilder()
+            .token(config.BOT_TOKEN)
+            .post_init(startup_handler)
+            .post_shutdown(shutdown_handler)
+            .concurrent_updates(config.CONCURRENT_UPDATES or False)
+            .build()
+            )
+    add_handlers(app)
 
+    app.run_polling()
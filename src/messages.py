@@ -26,3 +26,6 @@ HOTEL_MESSAGE_TEMPLATE = """📛 Название отеля: {hotel_name}
 💰 Цена отеля за все дни: {hotel_price}
 <a href="{hotel_link}">Ссылка</a>
 """
+
+STALE_HOTEL_MESSAGE = "⚠️ Сервис отелей недоступен, данные могут быть устаревшими"
+UNKNOWN_ERROR_MESSAGE = "Что-то пошло не так, попробуйте позже."
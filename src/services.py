@@ -6,33 +6,127 @@ so that the underlying library could easily be changed.
 Usage:
     import services
     city: models.CityLocationDataclass
-    city = services.search_city("New York")
+    city = await services.search_city("New York")
 """
 
+import asyncio
 import logging
 
-from typing import List, Generator
+from typing import List, Iterable, AsyncGenerator
 from datetime import datetime
 
 import pycountry
 
 import config
+import enums
 import random
 import messages
 import exceptions
 
-from lib import models, hotels, geocoding, exceptions as lib_exceptions
+from lib import models, hotels, batches, geocoding, meta, exceptions as lib_exceptions
+from base import api, cache, ratelimit, circuitbreaker
 
 
-HOTEL_CLIENT = hotels.HotelsAPI(api_key=config.RAPIDAPI_TOKEN)
-GEOCODING_CLIENT = geocoding.GeocodingAPI(api_key=config.RAPIDAPI_TOKEN)
+def _create_cache(
+        namespace: str, 
+        maxsize: int, 
+        ttl: float, 
+        stale_ttl: float = 0
+        ) -> cache.TTLCache:
+    """Creates a cache with a storage chosen in the config.
 
-META_DATA = HOTEL_CLIENT.get_meta_data()
+    Args:
+        namespace: a name of the cache to separate its' entries in a shared storage
+        maxsize: a maximum amount of entries to be stored
+        ttl: a default time-to-live of an entry in seconds
+        stale_ttl: for how long an expired entry could be served as a stale one
+    """
+    if config.CACHE_BACKEND == "sqlite":
+        storage = cache.SQLiteStorage(
+                config.CACHE_PATH, 
+                namespace=namespace, 
+                maxsize=maxsize,
+                max_bytes=config.CACHE_MAX_BYTES,
+                )
+    else:
+        storage = cache.MemoryStorage(maxsize)
+
+    return cache.TTLCache(ttl=ttl, stale_ttl=stale_ttl, storage=storage)
+
+
+# shared by the clients as long as they use the same api key
+RAPIDAPI_SCHEDULER = ratelimit.RateLimitScheduler(
+        rate=config.RAPIDAPI_RATE,
+        burst=config.RAPIDAPI_BURST,
+        max_queue=config.RAPIDAPI_MAX_QUEUE,
+        quota_reserve=config.RAPIDAPI_QUOTA_RESERVE,
+        )
+
+
+def _create_circuit_breaker(host: str) -> circuitbreaker.CircuitBreaker:
+    """Creates a circuit breaker of an api host configured in the config."""
+    return circuitbreaker.CircuitBreaker(
+            name=host,
+            failure_threshold=config.CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=config.CIRCUIT_RECOVERY_TIMEOUT,
+            )
 
 
+# expired entries of the caches below are answered with while the circuit
+# of the api host is open, hence they are kept for the CACHE_DEGRADED_TTL
+HOTEL_CLIENT = hotels.AsyncHotelsAPI(
+        api_key=config.RAPIDAPI_TOKEN,
+        scheduler=RAPIDAPI_SCHEDULER,
+        circuit_breaker=_create_circuit_breaker(hotels.AsyncHotelsAPI.host),
+        base_url=config.HOTELS_API_BASE_URL,
+        locations_cache=_create_cache(
+            "locations",
+            maxsize=config.LOCATIONS_CACHE_SIZE,
+            ttl=config.LOCATIONS_CACHE_TTL,
+            stale_ttl=config.CACHE_DEGRADED_TTL
+            ),
+        details_cache=_create_cache(
+            "details",
+            maxsize=config.DETAILS_CACHE_SIZE,
+            ttl=config.DETAILS_CACHE_TTL,
+            stale_ttl=config.DETAILS_CACHE_STALE_TTL
+            ),
+        search_cache=_create_cache(
+            "search",
+            maxsize=config.SEARCH_CACHE_SIZE,
+            ttl=config.SEARCH_CACHE_TTL,
+            stale_ttl=config.CACHE_DEGRADED_TTL
+            ),
+        )
+GEOCODING_CLIENT = geocoding.AsyncGeocodingAPI(
+        api_key=config.RAPIDAPI_TOKEN,
+        scheduler=RAPIDAPI_SCHEDULER,
+        circuit_breaker=_create_circuit_breaker(geocoding.AsyncGeocodingAPI.host),
+        base_url=config.GEOCODING_API_BASE_URL,
+        cache_=_create_cache(
+            "geocoding",
+            maxsize=config.GEOCODING_CACHE_SIZE, 
+            ttl=config.GEOCODING_CACHE_TTL,
+            stale_ttl=config.CACHE_DEGRADED_TTL
+            ),
+        )
+
+# loaded lazily from the snapshot, see start_background_tasks
+META_DATA = meta.HotelsMetaData(
+        client=HOTEL_CLIENT, 
+        snapshot_path=config.META_DATA_SNAPSHOT_PATH
+        )
+
+
+# sorting of the pages of properties in the api by the search strategies
+_STRATEGY_SORTS = {
+        enums.SearchStrategyEnum.by_price: hotels.EnumHotelsSort.price_asc,
+        enums.SearchStrategyEnum.by_distance: hotels.EnumHotelsSort.distance,
+        }
+
 logger = logging.getLogger("services")
 
-def search_city(city: str) -> models.CityLocationDataclass:
+async def search_city(city: str) -> models.CityLocationDataclass:
     """Searches for a city in a geocoding API.
 
     It searches for the full information from the user-put city name.
@@ -46,7 +140,7 @@ def search_city(city: str) -> models.CityLocationDataclass:
     Raises:
         exceptions.CityNotFoundException: if city was not found
     """
-    cities_alike = GEOCODING_CLIENT.forward_geocoding(city)
+    cities_alike = await GEOCODING_CLIENT.forward_geocoding(city)
     cities_alike = sorted(cities_alike, key=lambda loc: loc.importance)
     try:
         found_city = cities_alike[0]
@@ -55,7 +149,7 @@ def search_city(city: str) -> models.CityLocationDataclass:
     return found_city
 
 
-def search_hotels_city(city: models.LocationDataclass) -> models.LocationDataclass:
+async def search_hotels_city(city: models.LocationDataclass) -> models.LocationDataclass:
     """Searches for hotels API specific city.
 
     As long as hotels.com may not know about a certain city that we would like
@@ -71,7 +165,7 @@ def search_hotels_city(city: models.LocationDataclass) -> models.LocationDatacla
         exceptions.AmbigousCityException: if there were multiple cities found from the queried one
     """
 
-    locations = HOTEL_CLIENT.search_locations(city.name)
+    locations = await HOTEL_CLIENT.search_locations(city.name)
     locations = list(filter(lambda loc: loc.type == models.LocationTypeEnum.city, locations))
 
     if len(locations) > 1:
@@ -83,8 +177,8 @@ def search_hotels_city(city: models.LocationDataclass) -> models.LocationDatacla
     return locations[0]
 
 
-def search_hotels(
-        city: models.CityLocationDataclass, 
+async def search_hotels(
+        city: models.LocationDataclass, 
         hotels_count: int, 
         photos_count: int,
         check_in: datetime,
@@ -95,22 +189,28 @@ def search_hotels(
         rooms=hotels.HotelsRooms(adults=1),
         currency=models.EnumCurrency.USD,
         locale=models.EnumLocale.en_GB,
-        sort=hotels.EnumHotelsSort.price_asc,
-        sort_function=sorted,
+        strategy=enums.SearchStrategyEnum.by_price,
+        sort_function=None,
 
         result_offset=0,
         result_limit=20,
+        max_pages=config.SEARCH_MAX_PAGES,
+        details_concurrency=config.DETAILS_CONCURRENCY,
+        ordered=True,
+        deadline=config.SEARCH_DEADLINE,
 
-        ) -> Generator[models.PropertyDataclass, None, bool]:
+        ) -> AsyncGenerator[models.PropertyDataclass, None]:
     """Searches for the hotels from the hotels API and yields them.
 
     It's the mainly used method that is used to search hotels from the 
     hotels API.
 
     Args:
-        city: a string that represents a user-requested city to search hotels for
+        city: a hotels api specific city to search hotels in, as returned
+        from the search_hotels_city
         hotels_count: an amount of hotels to search for
-        photos_count: an amount of how many photos to include into the response
+        photos_count: an amount of how many photos to include into the response,
+        only as many links are parsed from the details of each property
         check_in: a datetime object that represents an information of a desired check-in date
         check_out: a datetime object that represents an information of a desired check-out date
 
@@ -121,24 +221,46 @@ def search_hotels(
         rooms: a dataclass that represents hotels-specific persons amount to search hotels with
         currency: a currency that should be used to return price with
         locale: a locale to be used to return string info with
-        sort: a hotels-specific sorting types to be used in a query
+        strategy: an order in which the hotels are queried page by page,
+        see enums.SearchStrategyEnum
+        sort_function: a function ranking a batch of the found properties
+        and selecting the first limit of them, they are left in the order
+        of the api if not provided
         result_offset: an offset from which to start search from
-        result_limit: amount of hotels to retrieve in one query
+        result_limit: amount of hotels to retrieve in one query, or one page
+        max_pages: a maximum amount of pages to retrieve, while there are
+        fewer than hotels_count hotels within the max_distance_downtown found,
+        or while the pages are within it if ordered by the distance
+        details_concurrency: how many properties details to fetch at the same time
+        ordered: whether to yield properties in the ranked order, or as soon
+        as the details of each are obtained
+        deadline: an overall time in seconds all the api requests of the
+        search could take, each request gets only the time left by the previous
 
     Note:
-        that this is a generator, it yields info one-by-one
+        that this is an async generator, it yields info one-by-one, while
+        the details of the properties are fetched concurrently. While the
+        hotels api is unavailable, the cached properties are yielded marked
+        as stale, and those without cached details are yielded without them
     """
 
 
-    destination = search_hotels_city(city)
-    logger.debug(destination)
-    destination = hotels.HotelsDestinationRegionID.from_location_dataclass(destination)
+    deadline = api.Deadline(deadline)
+
+    # the city is already resolved in the conversation, so it's reused
+    # here instead of searching for it once again
+    destination = hotels.HotelsDestinationRegionID.from_location_dataclass(city)
     logger.debug(destination)
 
     check_in = hotels.HotelsCheckpoint.from_datetime(check_in)
     check_out = hotels.HotelsCheckpoint.from_datetime(check_out)
 
     filters = [hotels.generic_search_filter_adapter(filter_) for filter_ in filters]
+    by_distance = strategy is enums.SearchStrategyEnum.by_distance
+    if by_distance:
+        # all the hotels within the distance are ranked, so they are
+        # fetched in fewer larger pages
+        result_limit = max(result_limit, config.SEARCH_DISTANCE_PAGE_SIZE)
     payload = hotels.HotelsPropertySearchDataclass(
             currency=currency,
             locale=locale,
@@ -148,22 +270,141 @@ def search_hotels(
             rooms=rooms,
             result_offset=result_offset,
             result_limit=result_limit,
-            sort=sort,
+            sort=_STRATEGY_SORTS[strategy],
             filters=filters
             )
  
     logger.debug(payload.build_query_dict())
-    properties = HOTEL_CLIENT.search_properties(payload)
-    _filter_lambda = lambda prop: float(prop.distance_from_downtown.get_kilometers()) <= max_distance_downtown
-    
+    properties = await _search_qualifying_properties(
+            payload,
+            hotels_count=hotels_count,
+            max_distance_downtown=max_distance_downtown,
+            max_pages=max_pages,
+            deadline=deadline,
+            by_distance=by_distance,
+            )
+
+    # the batch is ranked column-wise, the properties are copied only once
+    # the details of the selected ones are fetched, and only the first
+    # hotels_count of the qualifying ones are selected
     logger.debug(sort_function)
-    properties = sort_function(properties)
-    properties = filter(_filter_lambda, properties)
-    for property in properties:
-        property = HOTEL_CLIENT.update_property_with_info(property)
+    if sort_function is not None:
+        properties = sort_function(properties, limit=hotels_count)
+    else:
+        properties = properties.head(hotels_count)
+    updated_properties = _update_properties_with_info(
+            properties, 
+            photos_count=photos_count,
+            concurrency=details_concurrency, 
+            ordered=ordered,
+            deadline=deadline,
+            )
+    async for property in updated_properties:
         yield property
 
-    return properties
+
+async def _search_qualifying_properties(
+        payload: hotels.HotelsPropertySearchDataclass,
+        hotels_count: int,
+        max_distance_downtown: float,
+        max_pages: int,
+        deadline: api.Deadline,
+        by_distance: bool = False,
+        ) -> batches.PropertyBatch:
+    """Searches for the properties within the distance page by page.
+
+    The far away properties are filtered out of each page, while the next
+    one is prefetched, and the pages stop as soon as there are hotels_count
+    qualifying properties found, or max_pages of them are fetched.
+
+    The pages ordered by the distance stop as soon as a page goes beyond
+    the max_distance_downtown instead, as none of the next ones could be
+    within it, so that all the properties within the distance are found
+    to be ranked locally.
+
+    Args:
+        payload: a search for the first page of the properties
+        hotels_count: an amount of the qualifying properties to search for
+        max_distance_downtown: a maximum distance in kilometers of the qualifying properties
+        max_pages: a maximum amount of pages to fetch
+        deadline: a deadline the search requests are bound by
+        by_distance: whether the pages are ordered by the distance
+
+    Returns:
+        a batch of the qualifying properties of all the fetched pages
+
+    Note:
+        if any page but the first one fails, the properties found so far
+        are returned, as they are still better than none
+    """
+    found = []
+    found_count = 0
+    with api.deadline_scope(deadline):
+        pages = HOTEL_CLIENT.iter_properties(payload, max_pages=max_pages)
+        try:
+            async for page in pages:
+                qualifying = page.filter_range("distance", max_value=max_distance_downtown)
+                found.append(qualifying)
+                found_count += len(qualifying)
+                if by_distance:
+                    if len(qualifying) < len(page):
+                        break
+                elif found_count >= hotels_count:
+                    break
+        except lib_exceptions.RapidAPIException as e:
+            if not found:
+                raise
+            logger.warning("Stopped paging the properties on %r", e)
+        finally:
+            await pages.aclose()
+    return batches.PropertyBatch.concat(found)
+
+
+async def _update_properties_with_info(
+        properties: Iterable[models.PropertyDataclass],
+        photos_count: int,
+        concurrency: int,
+        ordered: bool = True,
+        deadline: api.Deadline = None,
+        ) -> AsyncGenerator[models.PropertyDataclass, None]:
+    """Fetches details of the properties concurrently and yields them.
+
+    Args:
+        properties: properties to fetch the details for
+        photos_count: an amount of the photos links to fetch for each property
+        concurrency: a maximum amount of details requests made at the same time
+        ordered: whether to yield properties in the given order or as soon
+        as the details of each are fetched
+        deadline: a deadline the details requests are bound by
+
+    Note:
+        pending requests are cancelled if the generator is closed before
+        all the properties were yielded. A property which details failed
+        to be fetched is yielded without them
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _update(prop):
+        async with semaphore:
+            try:
+                return await HOTEL_CLIENT.update_property_with_info(prop, photos_count)
+            except lib_exceptions.CircuitOpenException:
+                prop.is_stale = True
+                return prop
+            except lib_exceptions.RapidAPIException as e:
+                # a single failed property is still yielded, just without
+                # the details, instead of failing the whole answer
+                logger.warning("Failed to get details of property %s: %r", prop.id, e)
+                return prop
+
+    with api.deadline_scope(deadline):
+        tasks = [asyncio.ensure_future(_update(prop)) for prop in properties]
+    try:
+        for task in (tasks if ordered else asyncio.as_completed(tasks)):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
 
     
     
@@ -174,14 +415,33 @@ def build_message_from_property_dataclass(prop: models.PropertyDataclass):
         prop: a dataclass representing property for which the messge would be built
     """
 
-    return messages.HOTEL_MESSAGE_TEMPLATE.format(
+    message = messages.HOTEL_MESSAGE_TEMPLATE.format(
             hotel_name=prop.name, 
             hotel_address=prop.address,
             hotel_distance_downtown=prop.distance_from_downtown,
             hotel_price=prop.price,
             hotel_link="https://www.hotels.com/h{0}.Hotel-Information".format(prop.id)
             )
+    if prop.is_stale:
+        message = "{0}\n{1}".format(message, messages.STALE_HOTEL_MESSAGE)
+    return message
 
 def get_random_loading_message() -> str:
     """Returns a random progress loader message"""
     return random.choice(messages.LOADING_PROGRESS_MESSAGES)
+
+
+async def start_background_tasks(app):
+    """Loads the meta data and starts refreshing it in the background.
+
+    Args:
+        app: a telegram application to run the background tasks in
+    """
+    await META_DATA.ensure_loaded()
+    app.create_task(META_DATA.run_refreshes(config.META_DATA_REFRESH_INTERVAL))
+
+
+async def close_clients():
+    """Closes the sessions of the api clients used by the services."""
+    await HOTEL_CLIENT.aclose()
+    await GEOCODING_CLIENT.aclose()
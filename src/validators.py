@@ -3,12 +3,12 @@
 from typing import List
 from datetime import datetime
 
-import pycountry
 from lib import  models
 
 import exceptions
 import consts
 import services
+import countries
 
 
 def validate_float(text: str) -> float:
@@ -29,6 +29,30 @@ def validate_float(text: str) -> float:
         raise exceptions.NotNumericValueException from e
 
 
+def validate_int(text: str, max_value: int = None) -> int:
+    """Validates that the input string is a whole number and returns it.
+
+    Args:
+        text: a string to validate for being a whole number
+        max_value: a maximum value the number could be, not bound if None
+
+    Returns:
+        an int number if the validation was succesful
+
+    Raises:
+        exceptions.NotNumericValueException: if the provided value is not a whole number
+        exceptions.TooBigValueException: if the number is bigger than the max_value
+    """
+    try:
+        value = int(text)
+    except ValueError as e:
+        raise exceptions.NotNumericValueException from e
+
+    if max_value is not None and value > max_value:
+        raise exceptions.TooBigValueException(max_value)
+    return value
+
+
 def validate_date(text: str, format_=consts.DATE_FORMAT) -> datetime:
     """Validates that string is a date with the right format.
 
@@ -126,15 +150,20 @@ def validate_country_supported_from_city(city: models.CityLocationDataclass):
 
     Raises:
         exceptions.CityCountryNotSupportedException: if a country is not supported
+        exceptions.ServiceUnavailableException: if the supported countries
+        are not known yet, as the hotels api was unavailable
     """
-    country_from_city = city.country
-    country = pycountry.countries.search_fuzzy(country_from_city)[0]
+    if not services.META_DATA.is_loaded:
+        raise exceptions.ServiceUnavailableException
 
+    country_from_city = city.country
     try:
-        country_code = country.alpha_2
-        hotels_country_info = services.META_DATA[country_code]
-    except KeyError as e:
-        raise exceptions.CityCountryNotSupportedException(country_code) from e
+        country_code = countries.find_country_code(country_from_city)
+    except LookupError as e:
+        raise exceptions.CityCountryNotSupportedException(country_from_city) from e
+
+    if country_code not in services.META_DATA:
+        raise exceptions.CityCountryNotSupportedException(country_code)
 
 
 def validate_bool_answer(text: str) -> bool:
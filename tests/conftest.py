@@ -0,0 +1,10 @@
+import os
+import sys
+
+
+# the bot and the tools are not packages, their modules are imported by the
+# top-level names as they are when run from their directories
+ROOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+sys.path.insert(0, os.path.join(ROOT_PATH, "src"))
+sys.path.insert(0, os.path.join(ROOT_PATH, "tools"))
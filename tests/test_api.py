@@ -0,0 +1,147 @@
+"""Tests of the deadlines and the coalescing of the api client requests."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from base import api, circuitbreaker, ratelimit
+from lib import exceptions
+
+
+URL = "http://api.test/properties"
+
+
+class FakeUpstream:
+    """A transport that answers after a delay and counts the requests.
+
+    Attributes:
+        delay: how many seconds each request takes
+        calls: an amount of the requests made
+        cancelled: an amount of the requests cancelled before the answer
+    """
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return httpx.Response(200, json={})
+
+
+def build_client(upstream: FakeUpstream) -> api.AsyncRapidAPIBase:
+    client = api.AsyncRapidAPIBase("key", "api.test")
+    client._session = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+    return client
+
+
+def test_expired_deadline_makes_no_upstream_calls():
+    upstream = FakeUpstream()
+
+    async def request():
+        client = build_client(upstream)
+        with api.deadline_scope(api.Deadline(0)):
+            await client._request("GET", URL)
+
+    with pytest.raises(exceptions.DeadlineExceededException):
+        asyncio.run(request())
+    assert upstream.calls == 0
+
+
+def test_shared_request_is_cancelled_once_no_caller_waits():
+    upstream = FakeUpstream(delay=1)
+
+    async def request():
+        client = build_client(upstream)
+        with api.deadline_scope(api.Deadline(0.05)):
+            try:
+                await client._request("GET", URL)
+            finally:
+                # lets the cancelled request unwind
+                await asyncio.sleep(0.01)
+                assert not client._inflight
+
+    with pytest.raises(exceptions.DeadlineExceededException):
+        asyncio.run(request())
+    assert upstream.calls == 1
+    assert upstream.cancelled == 1
+
+
+def test_shared_request_is_made_within_latest_deadline_of_callers():
+    upstream = FakeUpstream(delay=0.1)
+
+    async def request():
+        client = build_client(upstream)
+
+        async def request_with_short_deadline():
+            with api.deadline_scope(api.Deadline(0.05)):
+                return await client._request("GET", URL)
+
+        short = asyncio.ensure_future(request_with_short_deadline())
+        await asyncio.sleep(0)
+        r = await client._request("GET", URL)
+        with pytest.raises(exceptions.DeadlineExceededException):
+            await short
+        return r
+
+    assert asyncio.run(request()).status_code == 200
+    assert upstream.calls == 1
+
+
+def test_request_cut_short_by_deadline_of_another_caller_is_remade():
+    upstream = FakeUpstream(delay=0.1)
+
+    async def request():
+        client = build_client(upstream)
+
+        async def request_with_short_deadline():
+            with api.deadline_scope(api.Deadline(0.05)):
+                return await client._request("GET", URL)
+
+        short = asyncio.ensure_future(request_with_short_deadline())
+        # the request is already being sent within the short deadline
+        await asyncio.sleep(0.01)
+        r = await client._request("GET", URL)
+        with pytest.raises(exceptions.DeadlineExceededException):
+            await short
+        return r
+
+    assert asyncio.run(request()).status_code == 200
+    assert upstream.calls == 2
+
+
+def test_timeout_shortened_by_deadline_is_not_host_failure():
+    upstream = FakeUpstream(delay=1)
+    breaker = circuitbreaker.CircuitBreaker("api.test", failure_threshold=1)
+
+    async def request():
+        client = build_client(upstream)
+        client._circuit_breaker = breaker
+        with api.deadline_scope(api.Deadline(0.05)):
+            await client._request("GET", URL)
+
+    with pytest.raises(exceptions.DeadlineExceededException):
+        asyncio.run(request())
+    assert breaker.state is circuitbreaker.CircuitStateEnum.closed
+
+
+def test_waiting_for_token_without_deadline_is_not_deadline_exceeded():
+    upstream = FakeUpstream()
+
+    async def request():
+        client = build_client(upstream)
+        client._scheduler = ratelimit.RateLimitScheduler(rate=0.1, burst=1)
+        client.default_timeout = 0.05
+        await client._request("GET", URL)
+        await client._request("GET", URL)
+
+    with pytest.raises(exceptions.RateLimitExceededException):
+        asyncio.run(request())
+    assert upstream.calls == 1
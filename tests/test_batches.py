@@ -0,0 +1,84 @@
+"""Tests of ranking the columnar batches of the found properties.
+
+Each of the tests is run both with numpy, if it's installed, and with the
+arrays of the array module the batches fall back to.
+"""
+
+import json
+
+import pytest
+
+import fake_rapidapi
+
+from lib import hotels, batches
+
+
+@pytest.fixture(params=["numpy", "array"])
+def columns(request, monkeypatch):
+    if request.param == "numpy":
+        if batches.numpy is None:
+            pytest.skip("numpy is not installed")
+    else:
+        monkeypatch.setattr(batches, "numpy", None)
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def properties() -> list:
+    response = json.loads(json.dumps(fake_rapidapi.SyntheticFixtures().properties("2621", 300)))
+    return hotels._parse_properties_response_into_dataclasses(response)
+
+
+def find_layers_naively(batch: batches.PropertyBatch) -> list:
+    """Returns the Pareto layers of the rows comparing each pair of them."""
+    points = list(zip(batch.get_column("price"), batch.get_column("distance")))
+    left = set(range(len(points)))
+    layers = [None] * len(points)
+    layer = 0
+    while left:
+        front = [
+                row for row in left
+                if not any(
+                    points[other] != points[row]
+                    and points[other][0] <= points[row][0]
+                    and points[other][1] <= points[row][1]
+                    for other in left
+                    )
+                ]
+        for row in front:
+            layers[row] = layer
+        left.difference_update(front)
+        layer += 1
+    return layers
+
+
+def get_ranked_layers(batch: batches.PropertyBatch, ranked: batches.PropertyBatch) -> list:
+    layers = find_layers_naively(batch)
+    position = {prop_id: row for row, prop_id in enumerate(batch.get_column("id"))}
+    return [layers[position[prop_id]] for prop_id in ranked.get_column("id")]
+
+
+def test_best_deals_are_ranked_by_pareto_layers(columns, properties):
+    batch = batches.PropertyBatch(properties)
+    ranked_layers = get_ranked_layers(batch, batch.rank_best_deals())
+
+    assert len(ranked_layers) == len(properties)
+    assert ranked_layers == sorted(find_layers_naively(batch))
+
+
+def test_top_best_deals_are_first_of_all_best_deals(columns, properties):
+    batch = batches.PropertyBatch(properties).filter_range("distance", max_value=5)
+    top = batch.rank_best_deals(limit=10)
+
+    assert len(top) == 10
+    assert list(top.get_column("id")) == list(batch.rank_best_deals().get_column("id"))[:10]
+
+
+def test_sort_by_price_is_stable_and_limited(columns, properties):
+    batch = batches.PropertyBatch(properties)
+    expected = sorted(properties, key=lambda prop: float(prop.price.price))
+
+    assert [prop.id for prop in batch.sort_by(("price",))] == [prop.id for prop in expected]
+    assert [prop.id for prop in batch.sort_by(("price",), limit=10)] == [
+            prop.id for prop in expected[:10]
+            ]
@@ -0,0 +1,43 @@
+"""Tests that the lookups of the sqlite cache don't write to the database."""
+
+from base import cache
+
+
+def build_cache(tmp_path, **kwargs) -> cache.TTLCache:
+    storage = cache.SQLiteStorage(str(tmp_path / "cache.sqlite3"), namespace="test", **kwargs)
+    return cache.TTLCache(ttl=60, storage=storage)
+
+
+def test_lookups_do_not_write(tmp_path):
+    cache_ = build_cache(tmp_path)
+    cache_.set("fresh", 1)
+    cache_.set("dead", 2, ttl=-1)
+    connection = cache_._storage._connection
+    changes = connection.total_changes
+
+    assert cache_.get("fresh") == 1
+    assert cache_.get("dead") is None
+    assert cache_.get("missing") is None
+    assert connection.total_changes == changes
+
+
+def test_unloadable_entry_is_miss_and_deleted_later(tmp_path):
+    cache_ = build_cache(tmp_path, evict_every=2)
+    storage = cache_._storage
+    cache_.set("broken", 1)
+    storage._connection.execute("UPDATE cache_entries SET value = ?", (b"broken", ))
+    changes = storage._connection.total_changes
+
+    assert cache_.get("broken") is None
+    assert cache_.get("broken") is None
+    assert storage._connection.total_changes == changes
+
+    cache_.set("other", 2)
+    assert len(storage) == 1
+
+
+def test_dead_entries_are_evicted(tmp_path):
+    cache_ = build_cache(tmp_path, evict_every=1)
+    cache_.set("dead", 1, ttl=-1)
+    cache_.set("fresh", 2)
+    assert len(cache_) == 1
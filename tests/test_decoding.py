@@ -0,0 +1,43 @@
+"""Tests that the api decodes the responses the same with orjson and without.
+
+The api decodes the responses with orjson if it's installed, and with the
+json module otherwise, so the parsed properties must not depend on which
+of the decoders is used.
+"""
+
+import json
+
+import pytest
+
+import fake_rapidapi
+
+from base import api
+from lib import hotels
+
+
+@pytest.fixture(params=["orjson", "json"])
+def decoder(request, monkeypatch):
+    if request.param == "orjson":
+        monkeypatch.setattr(api, "orjson", pytest.importorskip("orjson"))
+    else:
+        monkeypatch.setattr(api, "orjson", None)
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def properties_response() -> dict:
+    return fake_rapidapi.SyntheticFixtures().properties("2621", 1000)
+
+
+def test_decode_json_decodes_properties_response(decoder, properties_response):
+    content = json.dumps(properties_response).encode()
+    assert api.decode_json(content) == json.loads(content)
+
+
+def test_decoded_properties_are_parsed_as_json_ones(decoder, properties_response):
+    content = json.dumps(properties_response).encode()
+    expected = hotels._parse_properties_response_into_dataclasses(json.loads(content))
+    actual = hotels._parse_properties_response_into_dataclasses(api.decode_json(content))
+
+    assert len(actual) == 1000
+    assert actual == expected
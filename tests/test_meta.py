@@ -0,0 +1,49 @@
+"""Tests of loading the hotels api meta data from a broken snapshot."""
+
+import asyncio
+
+import pytest
+
+from lib import hotels, meta
+
+
+COUNTRIES = {"US": hotels.HotelsCountryInfoDataclass(code="US", site_id=300000001, tpid=1)}
+
+
+class FakeHotelsAPI:
+    """A client which answers with the meta data and counts the requests."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get_meta_data(self):
+        self.calls += 1
+        return dict(COUNTRIES)
+
+
+@pytest.mark.parametrize("content", ['{"US": {"code": "US"', '{"US": {"id": 1}}', "[]"])
+def test_broken_snapshot_is_loaded_from_api(tmp_path, content):
+    snapshot_path = tmp_path / "meta_data.json"
+    snapshot_path.write_text(content)
+    client = FakeHotelsAPI()
+    meta_data = meta.HotelsMetaData(client=client, snapshot_path=str(snapshot_path))
+
+    assert not meta_data.is_loaded
+    asyncio.run(meta_data.ensure_loaded())
+
+    assert client.calls == 1
+    assert meta_data["US"] == COUNTRIES["US"]
+    # the broken snapshot is overwritten by the loaded one
+    assert meta.HotelsMetaData(client=client, snapshot_path=str(snapshot_path)).is_loaded
+
+
+def test_broken_snapshot_is_not_read_again_until_changed(tmp_path, monkeypatch):
+    snapshot_path = tmp_path / "meta_data.json"
+    snapshot_path.write_text("{")
+    meta_data = meta.HotelsMetaData(client=FakeHotelsAPI(), snapshot_path=str(snapshot_path))
+    assert not meta_data.is_loaded
+
+    loads = []
+    monkeypatch.setattr(meta.json, "load", lambda f: loads.append(f) or {})
+    assert not meta_data.is_loaded
+    assert not loads
@@ -0,0 +1,35 @@
+"""Tests of parsing the rate limit headers of the api responses."""
+
+import pytest
+
+from base import ratelimit
+
+
+@pytest.mark.parametrize("headers", [
+    {"X-RateLimit-Requests-Remaining": ""},
+    {"X-RateLimit-Requests-Remaining": "many"},
+    {"X-RateLimit-Requests-Remaining": "1.5"},
+    ])
+def test_malformed_remaining_quota_is_ignored(headers):
+    scheduler = ratelimit.RateLimitScheduler(rate=5, burst=5)
+    scheduler.update_from_headers(headers, 200)
+    assert scheduler.remaining_quota is None
+
+
+@pytest.mark.parametrize("reset", ["", "soon", "nan", "inf", "-1"])
+def test_malformed_quota_reset_falls_back_to_default(reset):
+    timer = lambda: 100
+    scheduler = ratelimit.RateLimitScheduler(rate=5, burst=5, timer=timer)
+    scheduler.update_from_headers(
+            {"X-RateLimit-Requests-Remaining": "10", "X-RateLimit-Requests-Reset": reset},
+            200
+            )
+    assert scheduler.remaining_quota == 10
+    assert scheduler._quota_reset_at == 160
+
+
+@pytest.mark.parametrize("value, delay", [
+    (None, 1), ("", 1), ("3", 3), ("-5", 0), ("nan", 1), ("Wed, 21 Oct 2015 07:28:00 GMT", 0),
+    ])
+def test_retry_after_is_parsed_defensively(value, delay):
+    assert ratelimit.parse_retry_after(value, default=1) == delay
@@ -0,0 +1,592 @@
+"""A local stand-in server for the hotels4 and geocoding RapidAPI apis.
+
+It serves the endpoints the bot uses, so that the bot could be load tested
+and benchmarked without spending the RapidAPI quota:
+    /locations/v3/search
+    /properties/v2/list
+    /properties/v2/detail
+    /v2/get-meta-data
+    /v1/forward
+
+The responses are replayed from the fixtures recorded from the real apis,
+and whatever is not recorded is generated synthetically. Latency, errors and
+the rate limit headers could be injected to see how the bot copes with them.
+
+The fixtures are stored as JSON files by an endpoint and a lookup value of
+the request, e.g: fixtures/properties_list/2621.json for the regionId 2621,
+so that a recorded search is replayed for any dates and filters. The list of
+properties is filtered by price, sorted and paged on each request.
+
+Usage:
+    # record the fixtures from the real apis
+    python tools/fake_rapidapi.py record --fixtures tools/fixtures --city "New York"
+
+    # generate a synthetic fixture of a large city
+    python tools/fake_rapidapi.py generate --fixtures tools/fixtures --city "Big City" --properties 5000
+
+    # serve the fixtures with 200-300ms latency and 5% of 503 errors
+    python tools/fake_rapidapi.py serve --fixtures tools/fixtures --latency 0.2 --jitter 0.1 --error-rate 0.05
+
+    # and point the bot at it
+    HOTELS_API_BASE_URL=http://127.0.0.1:8080 GEOCODING_API_BASE_URL=http://127.0.0.1:8080 python src/main.py
+
+    # or run it from the code, e.g: in a load test
+    with FakeRapidAPIServer(FixtureStore("tools/fixtures"), SyntheticFixtures()) as server:
+        client = AsyncHotelsAPI(api_key="fake", base_url=server.base_url)
+
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import random
+import hashlib
+import argparse
+import threading
+
+from typing import Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+HOTELS_HOST = "hotels4.p.rapidapi.com"
+GEOCODING_HOST = "forward-reverse-geocoding.p.rapidapi.com"
+
+# url path -> (a name of the fixtures directory, a host of the real api)
+ENDPOINTS = {
+        "/locations/v3/search": ("locations", HOTELS_HOST),
+        "/properties/v2/list": ("properties_list", HOTELS_HOST),
+        "/properties/v2/detail": ("properties_detail", HOTELS_HOST),
+        "/v2/get-meta-data": ("meta_data", HOTELS_HOST),
+        "/v1/forward": ("forward", GEOCODING_HOST),
+        }
+
+
+def _normalize(value: str) -> str:
+    return " ".join(str(value).split()).casefold()
+
+
+def get_lookup(path: str, params: dict, body: Optional[dict]) -> str:
+    """Returns a value a request is looked up in the fixtures by.
+
+    Args:
+        path: a url path of the request
+        params: query parameters of the request
+        body: a JSON body of the request, None if there is no such
+    """
+    if path == "/locations/v3/search":
+        return _normalize(params.get("q", ""))
+    if path == "/properties/v2/list":
+        return str(body["destination"]["regionId"])
+    if path == "/properties/v2/detail":
+        return str(body["propertyId"])
+    if path == "/v1/forward":
+        return _normalize(params.get("city", ""))
+    return "meta"
+
+
+class FixtureStore:
+    """Recorded responses stored as JSON files by an endpoint and a lookup.
+
+    Attributes:
+        path: a path to the fixtures directory
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _get_file_path(self, endpoint: str, lookup: str) -> str:
+        name = re.sub(r"[^\w\-]+", "_", lookup).strip("_")
+        if not name or name != lookup:
+            # the lookups which are not safe file names are disambiguated by a hash
+            name = "{0}-{1}".format(name, hashlib.sha1(lookup.encode()).hexdigest()[:8])
+        return os.path.join(self.path, endpoint, "{0}.json".format(name))
+
+    def get(self, endpoint: str, lookup: str) -> Optional[object]:
+        """Returns a recorded response body, None if there is no such."""
+        try:
+            with open(self._get_file_path(endpoint, lookup)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, endpoint: str, lookup: str, body: object):
+        """Stores a response body."""
+        file_path = self._get_file_path(endpoint, lookup)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as f:
+            json.dump(body, f, ensure_ascii=False)
+
+
+class SyntheticFixtures:
+    """Generates deterministic responses for whatever is not recorded.
+
+    The same lookup always gets the same response, so that the cached and
+    the fresh responses are alike.
+
+    Attributes:
+        properties_count: an amount of properties of each generated city
+        images_count: an amount of images of each generated property
+    """
+
+    def __init__(self, properties_count: int = 200, images_count: int = 30):
+        self.properties_count = properties_count
+        self.images_count = images_count
+
+    @staticmethod
+    def _get_seed(lookup: str) -> int:
+        return zlib.crc32(lookup.encode())
+
+    def _get_coordinates(self, lookup: str) -> Tuple[float, float]:
+        rand = random.Random(self._get_seed(lookup))
+        return round(rand.uniform(-60, 60), 4), round(rand.uniform(-180, 180), 4)
+
+    def get_region_id(self, city: str) -> str:
+        return str(self._get_seed(_normalize(city)) % 10 ** 7)
+
+    def locations(self, query: str) -> dict:
+        lat, long = self._get_coordinates(query)
+        return {"sr": [
+            {
+                "gaiaId": self.get_region_id(query),
+                "type": "CITY",
+                "regionNames": {"primaryDisplayName": query.title()},
+                "coordinates": {"lat": str(lat), "long": str(long)},
+                },
+            ]}
+
+    def properties(self, region_id: str, count: int = None) -> dict:
+        if count is None:
+            count = self.properties_count
+
+        rand = random.Random(self._get_seed(region_id))
+        lat, long = self._get_coordinates(region_id)
+        properties = []
+        for i in range(count):
+            property_id = "{0}{1:05d}".format(region_id, i)
+            amount = round(rand.lognormvariate(4.8, 0.6), 2)
+            # the fields the bot doesn't use are there to keep the size of
+            # the payload close to the real one
+            properties.append({
+                "__typename": "Property",
+                "id": property_id,
+                "name": "Hotel {0} #{1}".format(region_id, i),
+                "availability": {"available": True, "minRoomsLeft": rand.randint(1, 9)},
+                "propertyImage": {
+                    "alt": "Hotel {0} #{1}".format(region_id, i),
+                    "fallbackImage": None,
+                    "image": {
+                        "description": "Featured Image",
+                        "url": "https://images.example.com/{0}/0.jpg?impolicy=resizecrop&rw=455&ra=fit".format(property_id),
+                        },
+                    "subjectId": rand.randint(10 ** 6, 10 ** 7),
+                    },
+                "destinationInfo": {
+                    "distanceFromDestination": {
+                        "value": round(rand.expovariate(1 / 4), 2),
+                        "unit": "KILOMETER",
+                        },
+                    "distanceFromMessaging": None,
+                    "regionId": region_id,
+                    },
+                "mapMarker": {
+                    "label": "${0:.0f}".format(amount),
+                    "latLong": {
+                        "latitude": lat + rand.uniform(-0.2, 0.2),
+                        "longitude": long + rand.uniform(-0.2, 0.2),
+                        },
+                    },
+                "neighborhood": {"name": "District {0}".format(rand.randint(1, 20))},
+                "offerBadge": None,
+                "offerSummary": {"messages": [], "attributes": []},
+                "pinnedDetails": None,
+                "price": {
+                    "lead": {
+                        "amount": amount,
+                        "currencyInfo": {"code": "USD", "symbol": "$"},
+                        "formatted": "${0:.0f}".format(amount),
+                        },
+                    "options": [{
+                        "disclaimer": None,
+                        "formattedDisplayPrice": "${0:.0f}".format(amount),
+                        "strikeOut": None,
+                        }],
+                    "priceMessages": [{"value": "per night"}],
+                    "strikeOut": None,
+                    "displayMessages": [],
+                    },
+                "priceAfterLoyaltyPointsApplied": {"options": [], "lead": None},
+                "propertyFees": [],
+                "reviews": {"score": round(rand.uniform(5, 10), 1), "total": rand.randint(0, 5000)},
+                "star": rand.choice((None, 2.0, 3.0, 3.5, 4.0, 5.0)),
+                "supportingMessages": None,
+                "regionId": region_id,
+                "priceMetadata": {
+                    "discountType": None,
+                    "rateDiscount": None,
+                    "totalDiscountPercentage": None,
+                    },
+                "saveTripItem": None,
+                })
+        return {"data": {"propertySearch": {
+            "__typename": "PropertySearchResults",
+            "filterMetadata": {"amenities": [], "neighborhoods": [], "priceRange": {"max": 1000, "min": 0}},
+            "properties": properties,
+            "propertySearchListings": [],
+            "summary": {"matchedPropertiesSize": count, "resultMessages": []},
+            }}}
+
+    def property_details(self, property_id: str) -> dict:
+        images = [
+                {"image": {"url": "https://images.example.com/{0}/{1}.jpg".format(property_id, i)}}
+                for i in range(self.images_count)
+                ]
+        return {"data": {"propertyInfo": {
+            "summary": {"location": {"address": {
+                "addressLine": "{0} Synthetic street".format(property_id)
+                }}},
+            "propertyGallery": {"images": images},
+            }}}
+
+    def meta_data(self) -> dict:
+        countries = ("US", "GB", "DE", "FR", "IT", "ES", "TR", "AE", "TH", "JP")
+        return {
+                code: {"siteId": 300000000 + i, "TPID": 3000 + i, "EAPID": i}
+                for i, code in enumerate(countries)
+                }
+
+    def forward(self, city: str) -> list:
+        lat, long = self._get_coordinates(city)
+        return [{
+            "place_id": self._get_seed(city),
+            "display_name": "{0}, Synthetic County, United States".format(city.title()),
+            "lat": str(lat),
+            "lon": str(long),
+            "importance": 0.8,
+            }]
+
+    def generate(self, path: str, lookup: str) -> object:
+        """Returns a response of an endpoint by its' url path for the lookup."""
+        if path == "/locations/v3/search":
+            return self.locations(lookup)
+        if path == "/properties/v2/list":
+            return self.properties(lookup)
+        if path == "/properties/v2/detail":
+            return self.property_details(lookup)
+        if path == "/v1/forward":
+            return self.forward(lookup)
+        return self.meta_data()
+
+
+_SORT_KEYS = {
+        "PRICE_LOW_TO_HIGH": lambda prop: prop["price"]["lead"]["amount"],
+        "DISTANCE": lambda prop: prop["destinationInfo"]["distanceFromDestination"]["value"],
+        }
+
+
+def select_properties(response: dict, query: dict) -> dict:
+    """Filters by price, sorts and pages the properties as the api would."""
+    properties = response["data"]["propertySearch"]["properties"]
+
+    price = query.get("filters", {}).get("price")
+    if price:
+        properties = [
+                prop for prop in properties
+                if price["min"] <= prop["price"]["lead"]["amount"] <= price["max"]
+                ]
+
+    sort_key = _SORT_KEYS.get(query.get("sort"))
+    if sort_key is not None:
+        properties = sorted(properties, key=sort_key)
+
+    start = int(query.get("resultsStartingIndex", 0))
+    size = int(query.get("resultsSize", 50))
+    search = dict(response["data"]["propertySearch"], properties=properties[start:start + size])
+    return {"data": {"propertySearch": search}}
+
+
+class FakeRapidAPIServer:
+    """A threaded HTTP server pretending to be the RapidAPI apis.
+
+    Attributes:
+        store: recorded fixtures to replay, None to serve synthetic ones only
+        synthetic: synthetic fixtures to serve whatever is not recorded,
+            None to respond with 404 instead
+        latency: a base latency of each response in seconds
+        jitter: a maximum random latency added to the base one in seconds
+        error_rate: a share of the requests responded with an error
+        error_statuses: statuses of the injected errors, chosen randomly
+        quota: a quota reported in the X-RateLimit-* headers, None to omit them
+        requests_count: an amount of the requests served by an endpoint name
+    """
+
+    def __init__(
+            self,
+            store: FixtureStore = None,
+            synthetic: SyntheticFixtures = None,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            latency: float = 0,
+            jitter: float = 0,
+            error_rate: float = 0,
+            error_statuses: Tuple[int, ...] = (500, 502, 503),
+            quota: int = None,
+            seed: int = None,
+            ):
+        """Init the server, a free port is chosen if the port is 0."""
+        self.store = store
+        self.synthetic = synthetic
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.quota = quota
+        self.requests_count = {endpoint: 0 for endpoint, _ in ENDPOINTS.values()}
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._server = ThreadingHTTPServer((host, port), self._create_handler())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://{0}:{1}".format(host, port)
+
+    def _create_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._handle(self)
+
+            def do_POST(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _get_response(self, path: str, params: dict, body: Optional[dict]) -> Tuple[int, object]:
+        """Returns a status and a body of the response to the request."""
+        endpoint, _ = ENDPOINTS[path]
+        lookup = get_lookup(path, params, body)
+
+        response = None
+        if self.store is not None:
+            response = self.store.get(endpoint, lookup)
+        if response is None and self.synthetic is not None:
+            response = self.synthetic.generate(path, lookup)
+        if response is None:
+            return 404, {"message": "No fixture of {0} {1}".format(endpoint, lookup)}
+
+        if path == "/properties/v2/list":
+            response = select_properties(response, body)
+        return 200, response
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        url = urlsplit(request.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(request.headers.get("Content-Length", 0))
+        body = json.loads(request.rfile.read(length)) if length else None
+
+        with self._lock:
+            is_error = self._random.random() < self.error_rate
+            error_status = self._random.choice(self.error_statuses)
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            remaining = None
+            if self.quota is not None:
+                self.quota = max(self.quota - 1, 0)
+                remaining = self.quota
+
+        time.sleep(delay)
+
+        if url.path not in ENDPOINTS:
+            status, response = 404, {"message": "Endpoint doesn't exist"}
+        elif is_error:
+            status, response = error_status, {"message": "Injected error"}
+        else:
+            try:
+                status, response = self._get_response(url.path, params, body)
+            except (KeyError, TypeError) as e:
+                status, response = 400, {"message": "Bad request {0!r}".format(e)}
+            with self._lock:
+                self.requests_count[ENDPOINTS[url.path][0]] += 1
+
+        data = json.dumps(response).encode()
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(data)))
+        if remaining is not None:
+            request.send_header("X-RateLimit-Requests-Remaining", str(remaining))
+            request.send_header("X-RateLimit-Requests-Reset", "60")
+        if status == 429:
+            request.send_header("Retry-After", "1")
+        request.end_headers()
+        request.wfile.write(data)
+
+    def start(self) -> str:
+        """Starts serving in a background thread and returns the base url."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """Stops serving and closes the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def record(store: FixtureStore, api_key: str, city: str, properties_count: int, details_count: int):
+    """Records the responses of the real apis for a city into the fixtures.
+
+    Args:
+        store: fixtures to record the responses into
+        api_key: a RapidAPI key to make the requests with
+        city: a city to record the responses for
+        properties_count: an amount of properties to record
+        details_count: an amount of properties to record the details of
+    """
+    import httpx
+
+    def request(method, path, **kwargs):
+        host = ENDPOINTS[path][1]
+        headers = {"X-RapidAPI-Key": api_key, "X-RapidAPI-Host": host}
+        r = httpx.request(
+                method,
+                "https://{0}{1}".format(host, path),
+                headers=headers,
+                timeout=30,
+                **kwargs
+                )
+        r.raise_for_status()
+        return r.json()
+
+    forward = request("GET", "/v1/forward", params={"city": city, "accept-language": "en"})
+    store.put("forward", _normalize(city), forward)
+
+    store.put("meta_data", "meta", request("GET", "/v2/get-meta-data"))
+
+    locations = request("GET", "/locations/v3/search", params={"q": city, "locale": "en_GB"})
+    store.put("locations", _normalize(city), locations)
+    region_id = next(loc["gaiaId"] for loc in locations["sr"] if loc["type"] == "CITY")
+
+    check_in = time.localtime(time.time() + 30 * 24 * 60 * 60)
+    check_out = time.localtime(time.time() + 32 * 24 * 60 * 60)
+    query = {
+            "currency": "USD",
+            "locale": "en_GB",
+            "destination": {"regionId": region_id},
+            "checkInDate": {"day": check_in.tm_mday, "month": check_in.tm_mon, "year": check_in.tm_year},
+            "checkOutDate": {"day": check_out.tm_mday, "month": check_out.tm_mon, "year": check_out.tm_year},
+            "rooms": [{"adults": 1}],
+            "resultsStartingIndex": 0,
+            "resultsSize": properties_count,
+            "sort": "PRICE_LOW_TO_HIGH",
+            "filters": {},
+            }
+    properties = request("POST", "/properties/v2/list", json=query)
+    store.put("properties_list", region_id, properties)
+
+    for prop in properties["data"]["propertySearch"]["properties"][:details_count]:
+        details = request(
+                "POST",
+                "/properties/v2/detail",
+                json={"currency": "USD", "locale": "en_GB", "propertyId": prop["id"]}
+                )
+        store.put("properties_detail", str(prop["id"]), details)
+
+
+def generate(store: FixtureStore, synthetic: SyntheticFixtures, city: str, properties_count: int):
+    """Stores synthetic fixtures of a city with the amount of properties.
+
+    Note:
+        details of the properties are not stored, as they are generated on
+        the fly the same way
+    """
+    lookup = _normalize(city)
+    region_id = synthetic.get_region_id(city)
+
+    store.put("forward", lookup, synthetic.forward(city))
+    store.put("locations", lookup, synthetic.locations(city))
+    store.put("properties_list", region_id, synthetic.properties(region_id, properties_count))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="serve the fixtures")
+    serve_parser.add_argument("--fixtures", help="a fixtures directory to replay")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.add_argument("--latency", type=float, default=0)
+    serve_parser.add_argument("--jitter", type=float, default=0)
+    serve_parser.add_argument("--error-rate", type=float, default=0)
+    serve_parser.add_argument("--error-statuses", type=int, nargs="+", default=[500, 502, 503])
+    serve_parser.add_argument("--quota", type=int, help="a quota to report in the rate limit headers")
+    serve_parser.add_argument("--properties", type=int, default=200,
+            help="an amount of properties of the synthetic cities")
+    serve_parser.add_argument("--no-synthetic", action="store_true",
+            help="respond with 404 to whatever is not recorded")
+
+    record_parser = subparsers.add_parser("record", help="record the fixtures from the real apis")
+    record_parser.add_argument("--fixtures", required=True)
+    record_parser.add_argument("--city", required=True)
+    record_parser.add_argument("--properties", type=int, default=200)
+    record_parser.add_argument("--details", type=int, default=10)
+
+    generate_parser = subparsers.add_parser("generate", help="generate synthetic fixtures of a city")
+    generate_parser.add_argument("--fixtures", required=True)
+    generate_parser.add_argument("--city", required=True)
+    generate_parser.add_argument("--properties", type=int, default=5000)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        api_key = os.environ.get("RAPIDAPI_TOKEN")
+        if not api_key:
+            sys.exit("RAPIDAPI_TOKEN is required to record the fixtures")
+        record(FixtureStore(args.fixtures), api_key, args.city, args.properties, args.details)
+    elif args.command == "generate":
+        generate(FixtureStore(args.fixtures), SyntheticFixtures(), args.city, args.properties)
+    else:
+        server = FakeRapidAPIServer(
+                store=FixtureStore(args.fixtures) if args.fixtures else None,
+                synthetic=None if args.no_synthetic else SyntheticFixtures(args.properties),
+                host=args.host,
+                port=args.port,
+                latency=args.latency,
+                jitter=args.jitter,
+                error_rate=args.error_rate,
+                error_statuses=tuple(args.error_statuses),
+                quota=args.quota,
+                )
+        print("Serving on {0}".format(server.base_url))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
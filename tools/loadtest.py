@@ -0,0 +1,426 @@
+"""An end-to-end load test of the bot simulating concurrent Telegram users.
+
+Each simulated user goes through a scripted deals conversation, which is
+handled by the real handlers and the ConversationHandler of main.py. The bot
+talks to a fake Bot API, which records the sent messages instead of sending
+them, and to the local fake RapidAPI server from tools/fake_rapidapi.py.
+
+It reports:
+    time-to-first-hotel: from the last answer of a user to the first hotel
+        sent to them, p50/p95/p99
+    throughput: conversations and hotels completed per second
+    event loop lag: how late the event loop wakes up a sleeping task
+    memory: traced allocations per conversation, see tracemalloc
+
+Usage:
+    python tools/loadtest.py --users 500 --ramp 10 --api-latency 0.2
+    python tools/loadtest.py --users 200 --sequential-updates --json results.json
+    python tools/loadtest.py --command bestdeal --distance 2
+
+Note:
+    the config is read from the environment on import of the bot, so the
+    bot could be configured as usual, e.g: RAPIDAPI_RATE=50 python tools/loadtest.py
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import tracemalloc
+import statistics
+
+from http import HTTPStatus
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import telegram
+import telegram.request
+
+from telegram.ext import ApplicationBuilder
+
+import fake_rapidapi
+
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+CITIES = (
+        "New York", "Los Angeles", "Chicago", "Houston", "Phoenix",
+        "Philadelphia", "San Antonio", "San Diego", "Dallas", "San Jose",
+        "Austin", "Jacksonville", "Columbus", "Charlotte", "Indianapolis",
+        "Seattle", "Denver", "Boston", "Nashville", "Portland",
+        )
+
+
+def get_percentile(values: List[float], percent: float) -> Optional[float]:
+    """Returns a percentile of the values by the nearest rank, None if empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(int(round(percent / 100 * len(values))) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+            "p50": get_percentile(values, 50),
+            "p95": get_percentile(values, 95),
+            "p99": get_percentile(values, 99),
+            "max": max(values) if values else None,
+            "mean": statistics.fmean(values) if values else None,
+            }
+
+
+class FakeBotAPI(telegram.request.BaseRequest):
+    """A Bot API that records the sent messages instead of sending them.
+
+    Attributes:
+        latency: a latency of each Bot API call in seconds
+        inboxes: queues of the messages sent to the users by their chat ids
+    """
+
+    def __init__(self, latency: float = 0):
+        self.latency = latency
+        self.inboxes: Dict[int, asyncio.Queue] = {}
+        self._message_ids = iter(range(1, sys.maxsize))
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def _create_message(self, chat_id: int, **kwargs) -> dict:
+        return {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                **kwargs
+                }
+
+    async def do_request(self, url: str, method: str, request_data=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        endpoint = url.rsplit("/", 1)[-1]
+        parameters = request_data.parameters if request_data is not None else {}
+
+        if endpoint == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Bot", "username": "hotels_bot"}
+        elif endpoint == "sendMessage":
+            chat_id = int(parameters["chat_id"])
+            self._deliver(chat_id, parameters["text"])
+            result = self._create_message(chat_id, text=parameters["text"])
+        elif endpoint == "sendMediaGroup":
+            chat_id = int(parameters["chat_id"])
+            media = parameters["media"]
+            self._deliver(chat_id, media[0].get("caption", ""))
+            result = [
+                    self._create_message(chat_id, photo=[], caption=item.get("caption"))
+                    for item in media
+                    ]
+        else:
+            result = True
+
+        return HTTPStatus.OK, json.dumps({"ok": True, "result": result}).encode()
+
+    def _deliver(self, chat_id: int, text: str):
+        self.inboxes.setdefault(chat_id, asyncio.Queue()).put_nowait((time.perf_counter(), text))
+
+
+class ConversationResult:
+    """An outcome of a single simulated conversation.
+
+    Attributes:
+        ok: whether all the expected hotels were received
+        error: a reason the conversation failed, None if it didn't
+        time_to_first_hotel: seconds from the last answer to the first hotel
+        duration: seconds from the first message to the last hotel
+        hotels_count: an amount of the received hotels
+    """
+
+    def __init__(self):
+        self.ok = False
+        self.error = None
+        self.time_to_first_hotel = None
+        self.duration = None
+        self.hotels_count = 0
+
+
+class LoadTest:
+    """Drives the bot handlers through the scripted conversations.
+
+    Attributes:
+        app: a telegram application with the handlers of the bot
+        bot_api: a fake Bot API the application sends messages to
+        messages: the messages module of the bot to check the replies with
+        error_messages: replies of the bot meaning the conversation failed
+    """
+
+    def __init__(self, app, bot_api, messages, exceptions, args):
+        self.app = app
+        self.bot_api = bot_api
+        self.messages = messages
+        self.args = args
+
+        # replies of the error handler, which end the conversation
+        self.error_messages = {messages.UNKNOWN_ERROR_MESSAGE}
+        exception_classes = [exceptions.BotException]
+        while exception_classes:
+            exception_class = exception_classes.pop()
+            exception_classes.extend(exception_class.__subclasses__())
+            if hasattr(exception_class, "message"):
+                self.error_messages.add(exception_class.message)
+
+        self._update_ids = iter(range(1, sys.maxsize))
+
+    def _create_update(self, user_id: int, text: str):
+        message = {
+                "message_id": next(self._update_ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "User{0}".format(user_id)},
+                "text": text,
+                }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+
+        update = {"update_id": next(self._update_ids), "message": message}
+        return telegram.Update.de_json(update, self.app.bot)
+
+    def _create_script(self, rand: random.Random):
+        """Returns (a user message, an expected reply) pairs of a conversation."""
+        check_in = datetime.now() + timedelta(days=rand.randint(1, 60))
+        check_out = check_in + timedelta(days=rand.randint(1, 14))
+        messages = self.messages
+        return [
+                ("/" + self.args.command, messages.ASK_LOCATION_MESSAGE),
+                (rand.choice(self.args.cities), messages.ASK_CHECKIN_DATE_MESSAGE),
+                (check_in.strftime("%d.%m.%Y"), messages.ASK_CHECKOUT_DATE_MESSAGE),
+                (check_out.strftime("%d.%m.%Y"), messages.ASK_HOTELS_COUNT_MESSAGE),
+                (str(self.args.hotels), messages.ASK_PRICE_RANGE_MESSAGE),
+                ("10-100000", messages.ASK_DISTANCE_DOWNTOWN_MESSAGE),
+                (str(self.args.distance), messages.ASK_LOAD_PHOTOS_MESSAGE),
+                ("да" if self.args.photos else "нет", None),
+                ]
+
+    async def _receive(self, inbox: asyncio.Queue):
+        return await asyncio.wait_for(inbox.get(), self.args.timeout)
+
+    async def run_conversation(self, user_id: int) -> ConversationResult:
+        result = ConversationResult()
+        rand = random.Random(user_id)
+        inbox = self.bot_api.inboxes.setdefault(user_id, asyncio.Queue())
+
+        started_at = time.perf_counter()
+        try:
+            for text, expected_reply in self._create_script(rand):
+                if self.args.think_time:
+                    await asyncio.sleep(rand.uniform(0, self.args.think_time))
+
+                answered_at = time.perf_counter()
+                await self.app.update_queue.put(self._create_update(user_id, text))
+                if expected_reply is None:
+                    break
+
+                _, reply = await self._receive(inbox)
+                if reply != expected_reply:
+                    result.error = "unexpected reply to {0!r}: {1!r}".format(text, reply)
+                    return result
+
+            # the loading message and the hotels follow the last answer
+            while result.hotels_count < self.args.hotels:
+                received_at, reply = await self._receive(inbox)
+                if reply in self.error_messages:
+                    result.error = "error reply: {0!r}".format(reply)
+                    return result
+                if "Hotel-Information" not in reply:
+                    continue
+                if result.time_to_first_hotel is None:
+                    result.time_to_first_hotel = received_at - answered_at
+                result.hotels_count += 1
+        except asyncio.TimeoutError:
+            result.error = "timeout"
+            return result
+
+        result.duration = time.perf_counter() - started_at
+        result.ok = True
+        return result
+
+    async def run_users(self) -> List[ConversationResult]:
+        async def _run_user(user_id, delay):
+            await asyncio.sleep(delay)
+            return await self.run_conversation(user_id)
+
+        ramp = self.args.ramp
+        users = self.args.users
+        return await asyncio.gather(*[
+            _run_user(user_id, ramp * i / users)
+            for i, user_id in enumerate(range(1000, 1000 + users))
+            ])
+
+
+async def measure_loop_lag(lags: List[float], interval: float = 0.05):
+    """Samples how late the event loop wakes up a task, supposed to be cancelled."""
+    while True:
+        started_at = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started_at - interval)
+
+
+def configure_environment(args, base_url: str, tmp_dir: str):
+    """Configures the bot through the environment before it's imported."""
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:fake")
+    os.environ.setdefault("RAPIDAPI_TOKEN", "fake")
+    os.environ["HOTELS_API_BASE_URL"] = base_url
+    os.environ["GEOCODING_API_BASE_URL"] = base_url
+    os.environ.setdefault("CACHE_BACKEND", "memory")
+    os.environ.setdefault("META_DATA_SNAPSHOT_PATH", os.path.join(tmp_dir, "meta_data.json"))
+    sys.path.insert(0, SRC_PATH)
+
+
+async def run(args) -> dict:
+    # the bot is configured on import, see configure_environment
+    import main
+    import config
+    import services
+    import messages
+    import exceptions
+
+    logging.getLogger().setLevel(args.log_level)
+
+    bot_api = FakeBotAPI(latency=args.bot_latency)
+    app = (
+            ApplicationBuilder()
+            .token(os.environ["TELEGRAM_BOT_TOKEN"])
+            .request(bot_api)
+            .get_updates_request(bot_api)
+            .updater(None)
+            .concurrent_updates((config.CONCURRENT_UPDATES or False) if args.concurrent_updates else False)
+            .build()
+            )
+    main.add_handlers(app)
+
+    lags = []
+    async with app:
+        await services.META_DATA.ensure_loaded()
+        await app.start()
+
+        lag_task = asyncio.create_task(measure_loop_lag(lags))
+        if args.memory:
+            tracemalloc.start()
+        memory_before, _ = tracemalloc.get_traced_memory()
+
+        load_test = LoadTest(app, bot_api, messages, exceptions, args)
+        started_at = time.perf_counter()
+        results = await load_test.run_users()
+        elapsed = time.perf_counter() - started_at
+
+        memory_after, memory_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        lag_task.cancel()
+
+        await app.stop()
+        await services.close_clients()
+
+    succeeded = [result for result in results if result.ok]
+    errors = {}
+    for result in results:
+        if result.error is not None:
+            errors[result.error] = errors.get(result.error, 0) + 1
+
+    return {
+            "users": args.users,
+            "succeeded": len(succeeded),
+            "errors": errors,
+            "elapsed": elapsed,
+            "time_to_first_hotel": summarize([r.time_to_first_hotel for r in succeeded]),
+            "conversation_duration": summarize([r.duration for r in succeeded]),
+            "throughput": {
+                "conversations_per_second": len(succeeded) / elapsed,
+                "hotels_per_second": sum(r.hotels_count for r in results) / elapsed,
+                },
+            "event_loop_lag": summarize(lags),
+            "memory": {
+                "retained_per_conversation": (memory_after - memory_before) / args.users,
+                "peak_per_conversation": (memory_peak - memory_before) / args.users,
+                } if args.memory else None,
+            }
+
+
+def print_report(report: dict):
+    def _format(summary, scale=1000, unit="ms"):
+        return "  ".join(
+                "{0}={1}".format(key, "-" if value is None else "{0:.1f}{1}".format(value * scale, unit))
+                for key, value in summary.items()
+                )
+
+    print("users: {users}, succeeded: {succeeded}, elapsed: {elapsed:.1f}s".format(**report))
+    for error, count in report["errors"].items():
+        print("  failed: {0} x{1}".format(error, count))
+    print("time to first hotel:   {0}".format(_format(report["time_to_first_hotel"])))
+    print("conversation duration: {0}".format(_format(report["conversation_duration"])))
+    print("throughput: {conversations_per_second:.2f} conversations/s, "
+          "{hotels_per_second:.2f} hotels/s".format(**report["throughput"]))
+    print("event loop lag:        {0}".format(_format(report["event_loop_lag"])))
+    if report["memory"] is not None:
+        print("memory per conversation: retained {0:.1f}KiB, peak {1:.1f}KiB".format(
+            report["memory"]["retained_per_conversation"] / 1024,
+            report["memory"]["peak_per_conversation"] / 1024,
+            ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--users", type=int, default=100, help="an amount of simulated users")
+    parser.add_argument("--ramp", type=float, default=5, help="seconds over which the users start")
+    parser.add_argument("--think-time", type=float, default=0,
+            help="a maximum pause of a user before each answer in seconds")
+    parser.add_argument("--command", default="lowprice", choices=("lowprice", "highprice", "bestdeal"),
+            help="a deals command the users search hotels with")
+    parser.add_argument("--hotels", type=int, default=5, help="an amount of hotels each user asks for")
+    parser.add_argument("--distance", type=float, default=1000,
+            help="a maximum distance from downtown in kilometers the users ask for")
+    parser.add_argument("--photos", action="store_true", help="whether the users ask for photos")
+    parser.add_argument("--cities", nargs="+", default=CITIES, help="cities the users pick from")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for each reply")
+    parser.add_argument("--sequential-updates", dest="concurrent_updates", action="store_false",
+            help="process the updates one by one instead of concurrently as the bot does")
+    parser.add_argument("--bot-latency", type=float, default=0, help="a latency of the Bot API in seconds")
+    parser.add_argument("--api-latency", type=float, default=0.1, help="a latency of the RapidAPI in seconds")
+    parser.add_argument("--api-jitter", type=float, default=0.05)
+    parser.add_argument("--api-error-rate", type=float, default=0)
+    parser.add_argument("--fixtures", help="a fixtures directory of the fake RapidAPI server")
+    parser.add_argument("--properties", type=int, default=200,
+            help="an amount of properties of the synthetic cities")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+            help="don't trace the memory, as tracing slows the bot down")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--json", help="a file to store the report in")
+    args = parser.parse_args(argv)
+
+    server = fake_rapidapi.FakeRapidAPIServer(
+            store=fake_rapidapi.FixtureStore(args.fixtures) if args.fixtures else None,
+            synthetic=fake_rapidapi.SyntheticFixtures(args.properties),
+            latency=args.api_latency,
+            jitter=args.api_jitter,
+            error_rate=args.api_error_rate,
+            )
+
+    with server, tempfile.TemporaryDirectory() as tmp_dir:
+        configure_environment(args, server.base_url, tmp_dir)
+        report = asyncio.run(run(args))
+        report["api_requests"] = server.requests_count
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()